@@ -0,0 +1,146 @@
+import ast
+import csv
+import os
+import tempfile
+from itertools import islice
+from task import Task, PersonalTask, WorkTask
+
+
+""" Class (CSV Task File) for reading and writing the tasks of the Task Manager to a CSV file without holding the whole file in memory.
+The file is read row by row, in chunks, and a task object is only built when its row is reached.
+Saving only appends the rows of the tasks that were added or changed since the last save, and a "tombstone" row (marked in the
+"deleted" column, so no task data can be mistaken for one) for every deleted task. When a task appears more than once, its last row counts. Once most rows of the file are old versions
+or tombstones, the file is compacted: the current tasks are written to a temporary file which then replaces the file in one step."""
+class CsvTaskFile:
+    COLUMNS = ["task_id", "title", "due_date", "status", "description", "flag", "team", "deleted"]
+    DELETED_MARK = "1"  # Value of the "deleted" column of a tombstone row; it is empty for a task
+    LEGACY_DELETED_STATUS = "deleted"  # Files without the "deleted" column marked tombstones with this status and no title or flag
+    CHUNK_SIZE = 10000  # Rows read at a time
+    COMPACT_RATIO = 2  # The file is compacted when it has more than this many rows per current task...
+    COMPACT_MIN_ROWS = 1000  # ...and at least this many rows
+
+    def __init__(self, file_name) -> None:
+        self.file_name = file_name
+        self._saved = {}  # Task ID -> hash of the task's last row in the file
+        self._rows = 0  # Number of rows in the file (besides the header)
+        self._attached = False  # Whether _saved describes the file, i.e. it was loaded or written by this object
+
+    """Function to read the tasks from the file. It returns a generator of chunks (lists) of (task_id, task) pairs; the task is None for a deleted task.
+    Raises FileNotFoundError right away if the file does not exist"""
+    def read_chunks(self, chunk_size=CHUNK_SIZE):
+        file = open(self.file_name, mode='r', newline='')
+        self._saved = {}
+        self._rows = 0
+        self._attached = True
+        return self._read_chunks(file, chunk_size)
+
+    def _read_chunks(self, file, chunk_size):
+        with file:
+            reader = csv.DictReader(file)
+            if reader.fieldnames is not None and "deleted" not in reader.fieldnames:
+                self._attached = False  # A file of the older format is rewritten by the next save, rows are not appended to it
+            while True:
+                chunk = [self._read_row(row) for row in islice(reader, chunk_size)]
+                if not chunk:
+                    break
+                yield chunk
+
+    def _read_row(self, row):
+        self._rows += 1
+        task = self.row_to_task(row)
+        if task is None:
+            task_id = int(row['task_id'])
+            self._saved.pop(task_id, None)
+            return task_id, None
+        self._saved[task.get_task_id()] = hash(tuple(self.task_to_row(task)))
+        return task.get_task_id(), task
+
+    """Function to save the tasks (a TaskStore). Only the rows of new or changed tasks, and tombstones of deleted tasks, are appended to the file.
+    The file is rewritten instead when it was not loaded or written before (like saving always did), or when it needs compacting"""
+    def save(self, tasks):
+        if not self._attached or not os.path.exists(self.file_name):
+            return self.rewrite(tasks)
+
+        rows = []
+        for task in tasks:
+            row = self.task_to_row(task)
+            digest = hash(tuple(row))
+            if self._saved.get(task.get_task_id()) != digest:
+                self._saved[task.get_task_id()] = digest
+                rows.append(row)
+        for task_id in [task_id for task_id in self._saved if task_id not in tasks]:
+            del self._saved[task_id]
+            rows.append([task_id, None, None, None, None, None, None, self.DELETED_MARK])
+
+        self._rows += len(rows)
+        if self._rows >= self.COMPACT_MIN_ROWS and self._rows > self.COMPACT_RATIO * len(self._saved):
+            return self.rewrite(tasks)
+        if rows:
+            with open(self.file_name, mode='a', newline='') as file:
+                csv.writer(file).writerows(rows)
+
+    """Function to write the current tasks to a new file, which then replaces the file. A crash while writing leaves the old file as it was"""
+    def rewrite(self, tasks):
+        directory = os.path.dirname(os.path.abspath(self.file_name))
+        saved = {}
+        file = tempfile.NamedTemporaryFile(mode='w', newline='', dir=directory, suffix='.tmp', delete=False)
+        try:
+            with file:
+                writer = csv.writer(file)
+                writer.writerow(self.COLUMNS)
+                for task in tasks:
+                    row = self.task_to_row(task)
+                    saved[task.get_task_id()] = hash(tuple(row))
+                    writer.writerow(row)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(file.name, self.file_name)
+        except BaseException:
+            os.remove(file.name)
+            raise
+        self._saved = saved
+        self._rows = len(saved)
+        self._attached = True
+
+    """Function to convert a task to a CSV row"""
+    @staticmethod
+    def task_to_row(task):
+        # Personal tasks have no team members
+        team = None if task.flag == 'personal' else getattr(task, 'team_members', None)
+        return [task.get_task_id(), task.title, task.due_date, task.status, task.get_description(), task.flag,
+                None if team is None else str(team), None]
+
+    """Function to convert a CSV row to a PersonalTask, WorkTask or (for any other flag) Task. It returns None for a tombstone row"""
+    @classmethod
+    def row_to_task(cls, row):
+        deleted = row.get('deleted')  # None in a file of the older format
+        if deleted == cls.DELETED_MARK:
+            return None
+        if deleted is None and row['status'] == cls.LEGACY_DELETED_STATUS and not row['title'] and not row['flag']:
+            return None
+        if row['flag'] == 'personal':
+            task = PersonalTask(row['title'], row['due_date'])
+        elif row['flag'] == 'work':
+            task = WorkTask(row['title'], row['due_date'])
+            for member in cls._parse_team(row['team']):
+                task.add_team_member(member)
+        else:
+            task = Task(row['title'], row['due_date'], row['flag'])
+        if row['task_id']:
+            task.set_task_id(int(row['task_id']))
+        if row['status']:
+            task.status = row['status']
+        if row['description']:
+            task.set_description(row['description'])
+        return task
+
+    # The team members are saved as a Python list, e.g. "['Dr. Gerel', 'Raph']"
+    @staticmethod
+    def _parse_team(value):
+        if not value:
+            return []
+        try:
+            team = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+        return [str(member) for member in team if member] if isinstance(team, list) else []
@@ -0,0 +1,221 @@
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+from array import array
+from datetime import datetime, date
+from task import Task, PersonalTask, WorkTask
+
+
+""" Binary snapshot of a task list, an alternative to the CSV file for large numbers of tasks.
+
+The file stores the tasks by column, so it can be memory-mapped and queried without creating the tasks:
+    header      magic, version, byte order mark, number of tasks, size of the value tables
+    values      JSON with the status and flag values the enum columns refer to
+    columns     task IDs (int64), due dates as date ordinals (int32, 0 when the date could not be read),
+                the rows sorted by due date (uint32), status, flag and priority (uint8 enums)
+    strings     offsets (uint64) of the title, due date, description and team of every task in the string table,
+                followed by the string table itself (UTF-8)
+Every section starts at a multiple of 8 bytes. The numbers are written in the byte order of the machine writing the file."""
+
+MAGIC = b"TASKSNAP"
+VERSION = 1
+BYTE_ORDER_MARK = 0x01020304
+HEADER = struct.Struct("=8sIIQQ")  # magic, version, byte order mark, number of tasks, size of the value tables
+DATE_FORMAT = '%Y/%m/%d'
+PRIORITIES = (None, "low", "medium", "high")  # Priority enum; 0 for tasks without a priority
+STRING_FIELDS = 4  # title, due date, description, team
+TEAM_SEPARATOR = "\x1f"  # Separates the team members of a task in the string table
+
+
+def _padding(size):
+    return b"\0" * (-size % 8)
+
+
+def _date_ordinal(due_date):
+    try:
+        return datetime.strptime(due_date, DATE_FORMAT).date().toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+"""Function to write the tasks to a snapshot file. The snapshot is written to a temporary file which then replaces the file,
+so the old snapshot stays intact if writing fails"""
+def write_snapshot(file_name, tasks):
+    statuses, flags = {}, {}
+    task_ids, ordinals = array('q'), array('i')
+    status_codes, flag_codes, priority_codes = array('B'), array('B'), array('B')
+    offsets, strings = array('Q', [0]), []
+    size = 0
+    for task in tasks:
+        task_ids.append(task.get_task_id())
+        ordinals.append(_date_ordinal(task.due_date))
+        status_codes.append(statuses.setdefault(task.status, len(statuses)))
+        flag_codes.append(flags.setdefault(task.flag, len(flags)))
+        priority_codes.append(PRIORITIES.index(getattr(task, 'priority', None)))
+        team = TEAM_SEPARATOR.join(getattr(task, 'team_members', None) or [])
+        for value in (task.title, task.due_date, task.get_description() or "", team):
+            encoded = str(value).encode('utf-8')
+            strings.append(encoded)
+            size += len(encoded)
+            offsets.append(size)
+    if len(statuses) > 256 or len(flags) > 256:
+        raise ValueError("A snapshot can hold at most 256 different statuses and flags.")
+    # Rows sorted by due date (and by position among equal dates), so the overdue tasks are found with a binary search
+    by_due_date = array('I', sorted(range(len(task_ids)), key=ordinals.__getitem__))
+
+    values = json.dumps({"status": list(statuses), "flag": list(flags)}).encode('utf-8')
+    sections = [values, task_ids.tobytes(), ordinals.tobytes(), by_due_date.tobytes(), status_codes.tobytes(),
+                flag_codes.tobytes(), priority_codes.tobytes(), offsets.tobytes()]
+
+    directory = os.path.dirname(os.path.abspath(file_name))
+    file = tempfile.NamedTemporaryFile(mode='wb', dir=directory, suffix='.tmp', delete=False)
+    try:
+        with file:
+            file.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER_MARK, len(task_ids), len(values)))
+            for section in sections:
+                file.write(section)
+                file.write(_padding(len(section)))
+            for encoded in strings:
+                file.write(encoded)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(file.name, file_name)
+    except BaseException:
+        os.remove(file.name)
+        raise
+
+
+""" Class (Task Snapshot) for reading a snapshot file through a memory map. The columns are read where they lie in the file, so opening
+a snapshot takes the same time for any number of tasks. Pending, overdue and flag queries look at the columns only,
+and a task object is created the first time its row is asked for (and then reused)"""
+class TaskSnapshot:
+    def __init__(self, file_name) -> None:
+        self.file_name = file_name
+        self._built = {}  # Row -> the task created for it
+        self._views = []
+        with open(file_name, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_columns()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_columns(self):
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.file_name} is not a task snapshot.")
+        magic, version, byte_order_mark, count, values_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.file_name} is not a task snapshot (version {VERSION}).")
+        if byte_order_mark != BYTE_ORDER_MARK:
+            raise ValueError(f"{self.file_name} was written on a machine with a different byte order.")
+        self._count = count
+
+        position = HEADER.size
+        values = json.loads(bytes(self._map[position:position + values_size]))
+        self._statuses, self._flags = values["status"], values["flag"]
+        position += values_size + len(_padding(values_size))
+
+        def column(item_format, length):
+            nonlocal position
+            view = memoryview(self._map)[position:position + length * struct.calcsize(item_format)].cast(item_format)
+            self._views.append(view)
+            position += view.nbytes + len(_padding(view.nbytes))
+            return view
+
+        self._task_ids = column('q', count)
+        self._ordinals = column('i', count)
+        self._by_due_date = column('I', count)
+        self._status_codes = column('B', count)
+        self._flag_codes = column('B', count)
+        self._priority_codes = column('B', count)
+        self._offsets = column('Q', count * STRING_FIELDS + 1)
+        self._strings = position
+
+    """Function to release the memory map. Tasks that were already created stay usable"""
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _string(self, row, field):
+        index = row * STRING_FIELDS + field
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._map[self._strings + start:self._strings + end].decode('utf-8')
+
+    def _rows_with_code(self, codes, values, value):
+        if value not in values:
+            return []
+        # The regular expression searches the column in C, without copying it
+        code = re.escape(bytes([values.index(value)]))
+        return [match.start() for match in re.finditer(code, codes)]
+
+    """Function to get the task of a row, creating it the first time"""
+    def task(self, row):
+        task = self._built.get(row)
+        if task is not None:
+            return task
+        flag = self._flags[self._flag_codes[row]]
+        title, due_date = self._string(row, 0), self._string(row, 1)
+        if flag == 'personal':
+            task = PersonalTask(title, due_date)
+        elif flag == 'work':
+            task = WorkTask(title, due_date)
+            team = self._string(row, 3)
+            task.team_members = team.split(TEAM_SEPARATOR) if team else []
+        else:
+            task = Task(title, due_date, flag)
+        task.set_task_id(self._task_ids[row])
+        task.status = self._statuses[self._status_codes[row]]
+        description = self._string(row, 2)
+        if description:
+            task.set_description(description)
+        if self._priority_codes[row]:
+            task.priority = PRIORITIES[self._priority_codes[row]]
+        self._built[row] = task
+        return task
+
+    """Function to get the parsed due date of a row, or None if it could not be read"""
+    def due_date(self, row):
+        ordinal = self._ordinals[row]
+        return date.fromordinal(ordinal) if ordinal else None
+
+    """Function to iterate over the tasks of some rows (all rows by default), creating them as they are reached"""
+    def tasks(self, rows=None):
+        for row in range(self._count) if rows is None else rows:
+            yield self.task(row)
+
+    """Function to get the rows of the tasks whose saved status is a certain status"""
+    def rows_with_status(self, status):
+        return self._rows_with_code(self._status_codes, self._statuses, status)
+
+    """Function to get the rows of the tasks with a certain flag"""
+    def rows_with_flag(self, flag):
+        return self._rows_with_code(self._flag_codes, self._flags, flag)
+
+    """Function to get the rows of the tasks due before a certain date, in order. Tasks whose due date could not be read are left out"""
+    def rows_due_before(self, before):
+        # Binary searches over the rows sorted by due date: the first readable date, and the first date on or after `before`
+        def first_on_or_after(ordinal):
+            low, high = 0, self._count
+            while low < high:
+                middle = (low + high) // 2
+                if self._ordinals[self._by_due_date[middle]] < ordinal:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+        return sorted(self._by_due_date[first_on_or_after(1):first_on_or_after(before.toordinal())])
@@ -21,6 +21,11 @@ class Task:
     def get_task_id(self):
         return self._task_id
 
+    """Setter function to set the task_id of a task, e.g. when it is loaded from a file. Tasks created later get higher IDs"""
+    def set_task_id(self, task_id):
+        self._task_id = task_id
+        Task._task_counter = max(Task._task_counter, task_id + 1)
+
     """Getter function to get the description of a task"""
     def get_description(self):
         return self._description
@@ -1,20 +1,27 @@
-import csv
 from datetime import datetime
-from task import Task, PersonalTask, WorkTask
+from csv_store import CsvTaskFile
+from snapshot import TaskSnapshot, write_snapshot
+from task import PersonalTask, WorkTask
+from task_store import TaskStore
 
 
 """ Super Class (Task Manager) for managing collection of Task objects"""
 class TaskManager:
     def __init__(self) -> None:
-        self.tasks = [] # Initializing empty list
+        self.tasks = TaskStore() # Initializing empty task store, indexed by task ID, status, flag and due date
         self.task_list_file_name = "task_list.csv"
+        self.task_file = None # CsvTaskFile of task_list_file_name, created when the tasks are first saved or loaded
+        self.snapshot_file_name = "task_list.snapshot"
+        self.snapshot = None # TaskSnapshot whose tasks have not been added to the task store yet (see load_snapshot)
 
     """Function to add task. Receives the task attributes as a parameter"""
     def add_task(self, task):
-        self.tasks.append(task)
+        self.build_snapshot_tasks()
+        self.tasks.add(task)
 
     """Function to list a list of tasks"""
     def list_tasks(self, flag=None):
+        self.build_snapshot_tasks()
         if(len(self.tasks) < 1):
             print("There are no tasks!")
         else:
@@ -25,74 +32,104 @@ class TaskManager:
 
     """Function to delete a certain task by specifying its ID"""
     def delete_task(self, task_id):
-        # Here I used next function (similar to using a for loop) to iterate over the tasks to find what we are looking for by its ID
-        task_to_delete = next((task for task in self.tasks if task.get_task_id() == task_id), None)
+        self.build_snapshot_tasks()
+        # The task store finds the task by its ID without going through the other tasks
+        task_to_delete = self.tasks.remove(task_id)
         if task_to_delete:
-            self.tasks.remove(task_to_delete)
             print(f"Task {task_id} deleted.")
         else:
             print("Task not found.")
 
-    """Function to save task to a CSV file"""
-    def save_task(self):
-        with open(self.task_list_file_name, mode='w', newline='') as file:
-            columns = ["task_id", "title", "due_date", "status", "description", "flag", 'team']
-            writer = csv.writer(file)
-            writer.writerow(columns)
+    """Function to get a certain task by its ID. It returns None if there is no such task"""
+    def get_task(self, task_id):
+        self.build_snapshot_tasks()
+        return self.tasks.get(task_id)
 
-            for task in self.tasks:
-                # Prepare the common fields
-                task_data = [
-                    task.get_task_id(), 
-                    task.title, 
-                    task.due_date, 
-                    task.status, 
-                    task.get_description(), 
-                    task.flag
-                ]
-                
-                # Add team_members or None based on the flag
-                if task.flag == 'personal':
-                    task_data.append(None)
-                else:
-                    task_data.append(task.team_members)
-                
-                # Write the row
-                writer.writerow(task_data)
+    """Function to get the CSV file of the tasks, following changes of task_list_file_name"""
+    def get_task_file(self):
+        if self.task_file is None or self.task_file.file_name != self.task_list_file_name:
+            self.task_file = CsvTaskFile(self.task_list_file_name)
+        return self.task_file
+
+    """Function to save task to a CSV file. After the first save (or a load), only the tasks added, changed or deleted since are written"""
+    def save_task(self):
+        self.build_snapshot_tasks()
+        self.get_task_file().save(self.tasks)
 
     """Function to load the tasks from the CSV file"""
     def load_task(self):
         try:
-            with open(self.task_list_file_name, mode='r') as file:
-                reader = csv.DictReader(file)
-                # Convert the reader to a list to check its length
-                rows = list(reader)
-                
-                if len(rows) < 1:
-                    self.tasks = []
-                else:
-                    self.tasks = [] # We set the tasks list to [] since we will display the tasks from the CSV file only
-                    for row in rows:
-                        if row['description'] is None:
-                            task = Task(row['title'], row['due_date'], row['flag'])
-                        else:
-                            task = Task(row['title'], row['due_date'], row['flag'])
-                            task.set_description(row['description'])
+            # The file is read in chunks, so it is never held in memory as a whole
+            chunks = self.get_task_file().read_chunks()
+            self.close_snapshot()
+            self.tasks.clear() # We empty the task store since we will display the tasks from the CSV file only
+            rows_read = 0
+            for chunk in chunks:
+                for task_id, task in chunk:
+                    if task is None: # The task was deleted
+                        self.tasks.remove(task_id)
+                    else: # A later row of the same task replaces the earlier one
                         self.add_task(task)
-                    
-                    print("Tasks loaded from CSV.")
-                return self.list_tasks()
+                rows_read += len(chunk)
+
+            if rows_read > 0:
+                print("Tasks loaded from CSV.")
+            return self.list_tasks()
         except FileNotFoundError:
             print("No saved tasks found.")
 
+    """Function to save the tasks to a binary snapshot file, which loads faster than the CSV file"""
+    def save_snapshot(self):
+        self.build_snapshot_tasks()
+        write_snapshot(self.snapshot_file_name, self.tasks)
+
+    """Function to load the tasks from the snapshot file. The file is memory-mapped and the tasks are only created when they are needed:
+    the pending, overdue and flag queries read the columns of the snapshot, and any other method adds all the tasks to the task store first"""
+    def load_snapshot(self):
+        try:
+            snapshot = TaskSnapshot(self.snapshot_file_name)
+        except FileNotFoundError:
+            print("No saved snapshot found.")
+            return
+        self.close_snapshot()
+        self.tasks.clear() # As with the CSV file, only the tasks of the snapshot are kept
+        self.snapshot = snapshot
+        print(f"{len(snapshot)} tasks loaded from snapshot.")
+
+    """Function to add the tasks of a loaded snapshot to the task store, and close the snapshot"""
+    def build_snapshot_tasks(self):
+        if self.snapshot is None:
+            return
+        for row, task in enumerate(self.snapshot.tasks()):
+            self.tasks.add(task, self.snapshot.due_date(row))
+        self.close_snapshot()
+
+    """Function to close a loaded snapshot without adding its tasks"""
+    def close_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
     """Function to get the pending tasks"""
     def get_pending_tasks(self):
-        return list(filter(lambda task: task.status == "pending", self.tasks))
+        if self.snapshot is not None:
+            # Tasks that were marked completed since they were created from the snapshot are left out
+            return [task for task in self.snapshot.tasks(self.snapshot.rows_with_status("pending")) if task.status == "pending"]
+        return self.tasks.with_status("pending")
+
+    """Function to get the tasks with a certain flag ('personal' or 'work')"""
+    def get_tasks_by_flag(self, flag):
+        if self.snapshot is not None:
+            return list(self.snapshot.tasks(self.snapshot.rows_with_flag(flag)))
+        return self.tasks.with_flag(flag)
 
     """Function to get the overdue tasks"""
     def get_overdue_tasks(self):
         current_date = datetime.now().date()
-        return [task for task in self.tasks if datetime.strptime(task.due_date, '%Y/%m/%d').date() < current_date]
+        if self.snapshot is not None:
+            return list(self.snapshot.tasks(self.snapshot.rows_due_before(current_date)))
+        # The due dates were parsed when the tasks were added, and are kept sorted
+        return self.tasks.due_before(current_date)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+
+
+""" Class (Task Store) for keeping the tasks of the Task Manager indexed, so finding, deleting and querying
+tasks does not have to go through every task.
+It keeps the tasks in a dictionary by task ID (in the order they were added), the task IDs by status and by flag,
+and the task IDs by due date, with a sorted list of the different due dates. The due date of a task is read once when the task is added."""
+class TaskStore:
+    DATE_FORMAT = '%Y/%m/%d'
+
+    def __init__(self) -> None:
+        self._tasks = {}        # Task ID -> task, in the order the tasks were added
+        self._by_status = {}    # Status -> {task ID: task}
+        self._by_flag = {}      # Flag -> {task ID: task}
+        self._by_due_date = {}  # Due date -> {task ID: position the task was added at}
+        self._due_dates = []    # Sorted list of the keys of _by_due_date
+        self._due_date_of = {}  # Task ID -> due date
+        self._position = {}     # Task ID -> position the task was added at
+        self._added = 0
+
+    """Function to add a task. A task with the same ID is replaced where it is, so it keeps its place in the order the tasks were added.
+    The parsed due date can be passed when it is already known"""
+    def add(self, task, due_date=None):
+        task_id = task.get_task_id()
+        if task_id in self._tasks:
+            position = self._unindex(task_id, task.status, task.flag)
+        else:
+            position = self._added
+            self._added += 1
+        self._tasks[task_id] = task  # Assigning an existing key keeps its place in the dictionary
+        self._position[task_id] = position
+        self._by_status.setdefault(task.status, {})[task_id] = task
+        self._by_flag.setdefault(task.flag, {})[task_id] = task
+        if due_date is None:
+            due_date = self._parse_date(task.due_date)
+        if due_date is not None:
+            # Only a due date no other task has is inserted into the sorted list, so adding many tasks stays cheap
+            if due_date not in self._by_due_date:
+                self._by_due_date[due_date] = {}
+                insort(self._due_dates, due_date)
+            self._by_due_date[due_date][task_id] = position
+            self._due_date_of[task_id] = due_date
+
+    """Function to remove a task by its ID. It returns the removed task, or None if there is no such task"""
+    def remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return None
+        self._unindex(task_id)
+        del self._position[task_id]
+        return task
+
+    """Function to take a task out of the status, flag and due date indexes. The task stays in the buckets of the status and flag
+    it is given, so replacing a task whose status or flag did not change keeps its place there too. It returns the position the task was added at"""
+    def _unindex(self, task_id, status=None, flag=None):
+        for buckets, kept in ((self._by_status, status), (self._by_flag, flag)):
+            for key, bucket in buckets.items():
+                if task_id in bucket:
+                    if key != kept:
+                        del bucket[task_id]
+                    break
+        due_date = self._due_date_of.pop(task_id, None)
+        if due_date is not None:
+            bucket = self._by_due_date[due_date]
+            del bucket[task_id]
+            if not bucket:
+                del self._by_due_date[due_date]
+                del self._due_dates[bisect_left(self._due_dates, due_date)]
+        return self._position[task_id]
+
+    """Function to get a task by its ID, or None if there is no such task"""
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    """Function to remove all the tasks"""
+    def clear(self):
+        self.__init__()
+
+    """Function to read the due date and status of a task again after they were changed"""
+    def reindex(self, task):
+        self.add(task)
+
+    """Function to get the tasks with a certain status, in the order they were added.
+    The status of a task can change after it was added (mark_completed), so the tasks of the bucket are checked and the ones
+    whose status changed are moved to the bucket of their new status. Tasks only change from "pending" to "completed", so the
+    pending tasks are always exact; call reindex after changing the status of a task in any other way"""
+    def with_status(self, status):
+        bucket = self._by_status.get(status, {})
+        tasks = []
+        for task_id, task in list(bucket.items()):
+            if task.status == status:
+                tasks.append(task)
+            else:
+                del bucket[task_id]
+                self._by_status.setdefault(task.status, {})[task_id] = task
+        return tasks
+
+    """Function to get the tasks with a certain flag ('personal' or 'work'), in the order they were added"""
+    def with_flag(self, flag):
+        return list(self._by_flag.get(flag, {}).values())
+
+    """Function to get the tasks due before a certain date, in the order they were added"""
+    def due_before(self, date):
+        entries = []
+        for due_date in self._due_dates[:bisect_left(self._due_dates, date)]:
+            entries.extend(self._by_due_date[due_date].items())
+        entries.sort(key=lambda entry: entry[1])
+        return [self._tasks[task_id] for task_id, _ in entries]
+
+    def _parse_date(self, due_date):
+        try:
+            return datetime.strptime(due_date, self.DATE_FORMAT).date()
+        except (TypeError, ValueError):
+            return None
+
+    def __iter__(self):
+        return iter(self._tasks.values())
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
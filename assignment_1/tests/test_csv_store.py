@@ -0,0 +1,111 @@
+import csv
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_store import CsvTaskFile
+from task import PersonalTask, WorkTask
+from task_store import TaskStore
+
+
+def task(task_id, title, status="pending", task_class=PersonalTask):
+    new_task = task_class(title, "2025/01/10")
+    new_task.set_task_id(task_id)
+    new_task.status = status
+    return new_task
+
+
+# This class represents the tests of CsvTaskFile appending rows, writing tombstones, compacting and reading the file back
+class CsvTaskFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks.csv")
+        self.file = CsvTaskFile(self.path)
+        self.store = TaskStore()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rows(self):
+        with open(self.path, newline='') as file:
+            return list(csv.reader(file))[1:]
+
+    def reload(self):
+        store = TaskStore()
+        for chunk in CsvTaskFile(self.path).read_chunks():
+            for task_id, loaded in chunk:
+                if loaded is None:
+                    store.remove(task_id)
+                else:
+                    store.add(loaded)
+        return {loaded.get_task_id(): (loaded.title, loaded.status, loaded.flag) for loaded in store}
+
+    def test_save_appends_changes_and_tombstones(self):
+        self.store.add(task(1, "First"))
+        self.store.add(task(2, "Second"))
+        self.file.save(self.store)
+        self.assertEqual(len(self.rows()), 2)
+
+        self.store.get(1).mark_completed()
+        self.store.remove(2)
+        self.store.add(task(3, "Third", task_class=WorkTask))
+        self.file.save(self.store)
+        rows = self.rows()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[-1], ["2", "", "", "", "", "", "", CsvTaskFile.DELETED_MARK])
+
+        # Nothing changed, nothing is appended
+        self.file.save(self.store)
+        self.assertEqual(len(self.rows()), 5)
+        self.assertEqual(self.reload(), {1: ("First", "completed", "personal"), 3: ("Third", "pending", "work")})
+
+    def test_task_with_status_deleted_is_not_a_tombstone(self):
+        self.store.add(task(1, "", status="deleted"))
+        self.file.rewrite(self.store)
+        self.store.add(task(2, "Second"))
+        self.file.save(self.store)
+
+        self.assertEqual(self.reload(), {1: ("", "deleted", "personal"), 2: ("Second", "pending", "personal")})
+
+    def test_save_compacts_the_file(self):
+        self.file.COMPACT_MIN_ROWS = 4
+        self.store.add(task(1, "First"))
+        self.store.add(task(2, "Second"))
+        self.file.save(self.store)
+        self.store.get(1).title = "First again"
+        self.file.save(self.store)
+        self.assertEqual(len(self.rows()), 3)
+
+        self.store.remove(2)
+        self.file.save(self.store)
+        self.assertEqual(self.rows(), [["1", "First again", "2025/01/10", "pending", "", "personal", "", ""]])
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith(".tmp")])
+        self.assertEqual(self.reload(), {1: ("First again", "pending", "personal")})
+
+    def test_legacy_file_is_read_and_rewritten(self):
+        with open(self.path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["task_id", "title", "due_date", "status", "description", "flag", "team"])
+            writer.writerow([1, "First", "2025/01/10", "pending", "", "personal", ""])
+            writer.writerow([2, "Second", "2025/01/10", "pending", "", "work", "['Ann']"])
+            writer.writerow([2, "", "", "deleted", "", "", ""])
+        self.assertEqual(self.reload(), {1: ("First", "pending", "personal")})
+
+        for chunk in self.file.read_chunks():
+            for task_id, loaded in chunk:
+                if loaded is None:
+                    self.store.remove(task_id)
+                else:
+                    self.store.add(loaded)
+        self.file.save(self.store)
+        with open(self.path, newline='') as file:
+            self.assertEqual(next(csv.reader(file)), CsvTaskFile.COLUMNS)
+        self.assertEqual(len(self.rows()), 1)
+        self.assertEqual(self.reload(), {1: ("First", "pending", "personal")})
+
+
+if __name__ == "__main__":
+    unittest.main()
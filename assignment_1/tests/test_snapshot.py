@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot import TaskSnapshot, write_snapshot
+from task import PersonalTask, WorkTask
+from task_store import TaskStore
+
+
+def details(task):
+    return (task.get_task_id(), type(task).__name__, task.title, task.due_date, task.status, task.get_description(),
+            task.flag, getattr(task, 'priority', None), getattr(task, 'team_members', None))
+
+
+# This class represents the tests of writing a snapshot and reading it back with TaskSnapshot
+class SnapshotRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tasks.snap")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_empty_store(self):
+        write_snapshot(self.path, TaskStore())
+        with TaskSnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 0)
+            self.assertEqual(list(snapshot.tasks()), [])
+            self.assertEqual(snapshot.rows_with_status("pending"), [])
+            self.assertEqual(snapshot.rows_due_before(date(2030, 1, 1)), [])
+
+    def test_populated_store(self):
+        store = TaskStore()
+        personal = PersonalTask("Dentist", "2025/03/01")
+        personal.set_task_id(7)
+        personal.set_priority("high")
+        personal.set_description("Check-up")
+        work = WorkTask("Report", "2025/01/15")
+        work.set_task_id(8)
+        work.add_team_member("Ann")
+        work.add_team_member("Bob")
+        work.mark_completed()
+        undated = WorkTask("Someday", "no date")
+        undated.set_task_id(9)
+        for task in (personal, work, undated):
+            store.add(task)
+
+        write_snapshot(self.path, store)
+        with TaskSnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 3)
+            self.assertEqual([details(task) for task in snapshot.tasks()], [details(task) for task in store])
+            self.assertEqual(snapshot.rows_with_status("pending"), [0, 2])
+            self.assertEqual(snapshot.rows_with_flag("work"), [1, 2])
+            self.assertEqual(snapshot.rows_due_before(date(2025, 2, 1)), [1])
+            self.assertEqual(snapshot.rows_due_before(date(2025, 12, 1)), [0, 1])
+            self.assertEqual(snapshot.due_date(0), date(2025, 3, 1))
+            self.assertIsNone(snapshot.due_date(2))
+            built = snapshot.task(1)
+        # Tasks created before closing stay usable
+        self.assertEqual(built.team_members, ["Ann", "Bob"])
+
+    def test_rewriting_replaces_the_snapshot(self):
+        store = TaskStore()
+        store.add(PersonalTask("First", "2025/01/01"))
+        write_snapshot(self.path, store)
+        write_snapshot(self.path, TaskStore())
+        with TaskSnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 0)
+        self.assertEqual(os.listdir(self.tmp.name), ["tasks.snap"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task import PersonalTask, WorkTask
+from task_store import TaskStore
+
+
+def task(task_id, due_date, status="pending", task_class=PersonalTask):
+    new_task = task_class(f"Task {task_id}", due_date)
+    new_task.set_task_id(task_id)
+    new_task.status = status
+    return new_task
+
+
+# This class represents the tests of TaskStore replacing a task that has the ID of a stored task
+class TaskStoreReplaceTest(unittest.TestCase):
+    def setUp(self):
+        self.store = TaskStore()
+        for task_id, due_date in ((1, "2025/01/10"), (2, "2025/01/20"), (3, "2025/01/05")):
+            self.store.add(task(task_id, due_date))
+
+    def ids(self, tasks):
+        return [stored.get_task_id() for stored in tasks]
+
+    def test_replacing_keeps_the_place_of_the_task(self):
+        replacement = task(2, "2025/01/01", status="completed", task_class=WorkTask)
+        self.store.add(replacement)
+
+        self.assertEqual(len(self.store), 3)
+        self.assertIs(self.store.get(2), replacement)
+        self.assertEqual(self.ids(self.store), [1, 2, 3])
+        self.assertEqual(self.ids(self.store.due_before(date(2025, 1, 15))), [1, 2, 3])
+        self.assertEqual(self.ids(self.store.with_status("pending")), [1, 3])
+        self.assertEqual(self.ids(self.store.with_status("completed")), [2])
+        self.assertEqual(self.ids(self.store.with_flag("personal")), [1, 3])
+        self.assertEqual(self.ids(self.store.with_flag("work")), [2])
+
+    def test_replacing_with_the_same_status_keeps_the_place_in_the_status(self):
+        self.store.add(task(1, "2025/02/01"))
+
+        self.assertEqual(self.ids(self.store.with_status("pending")), [1, 2, 3])
+        self.assertEqual(self.ids(self.store.due_before(date(2025, 1, 15))), [3])
+        self.assertEqual(self.ids(self.store.due_before(date(2025, 3, 1))), [1, 2, 3])
+
+    def test_replacing_the_only_task_of_a_due_date_drops_the_date(self):
+        self.store.add(task(3, "not a date"))
+
+        self.assertEqual(self.store._due_dates, [date(2025, 1, 10), date(2025, 1, 20)])
+        self.assertEqual(self.ids(self.store.due_before(date(2025, 2, 1))), [1, 2])
+        self.assertEqual(self.ids(self.store), [1, 2, 3])
+
+    def test_removed_task_added_again_goes_last(self):
+        self.store.remove(1)
+        self.store.add(task(1, "2025/01/10"))
+
+        self.assertEqual(self.ids(self.store), [2, 3, 1])
+        self.assertEqual(self.ids(self.store.due_before(date(2025, 2, 1))), [2, 3, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
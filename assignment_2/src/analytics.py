@@ -0,0 +1,132 @@
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only /tasks/analytics needs it
+    np = None
+
+# Message returned by the analytics when NumPy is not installed
+NUMPY_MISSING = "Task analytics need NumPy. Install it with `pip install numpy`."
+
+
+def available():
+    """
+    Returns whether NumPy is installed, i.e. whether the analytics can be computed.
+    """
+    return np is not None
+
+
+def _categorical(values):
+    """
+    Encodes a sequence of strings as integer codes and the sorted list of distinct values, with NumPy.
+
+    :param values: The values.
+    """
+    categories, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return codes.astype(np.int32), categories.tolist()
+
+
+def _dates(values):
+    """
+    Converts ISO `YYYY-MM-DD` strings to a `datetime64[D]` array in one go. None becomes NaT, and so do
+    values that are not valid dates, which are rare and parsed one by one.
+
+    :param values: The due dates as read by `fetch_analytics_rows`.
+    """
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        def parse(value):
+            try:
+                return np.datetime64(value, "D")
+            except (TypeError, ValueError):
+                return np.datetime64("NaT")
+        return np.array([parse(value) for value in values], dtype="datetime64[D]")
+
+
+# This class represents the tasks as NumPy columns: due dates as `datetime64[D]`, status and priority as
+# categorical codes, and the team members as (task row, member code) pairs. Every query is a handful of
+# vectorized comparisons and `bincount`s over the columns, without a Python loop over the tasks.
+class TaskColumns:
+    def __init__(self, task_rows, member_rows):
+        """
+        :param task_rows: `(task_id, due_date, status, priority)` rows ordered by `task_id`, as returned by `fetch_analytics_rows`.
+        :param member_rows: `(task_id, name)` rows of the team members.
+        """
+        if np is None:
+            raise RuntimeError(NUMPY_MISSING)
+        task_ids, due_dates, statuses, priorities = zip(*task_rows) if task_rows else ((), (), (), ())
+        self.task_ids = np.array(task_ids, dtype=np.int64)
+        self.due_dates = _dates(list(due_dates))
+        self.status_codes, self.statuses = _categorical(statuses)
+        self.priority_codes, self.priorities = _categorical(priorities)
+
+        # Members of tasks that are gone (or not loaded) are left out
+        member_task_ids, names = zip(*member_rows) if member_rows else ((), ())
+        member_task_ids = np.array(member_task_ids, dtype=np.int64)
+        rows = np.searchsorted(self.task_ids, member_task_ids)
+        known = rows < len(self.task_ids)
+        known[known] = self.task_ids[rows[known]] == member_task_ids[known]
+        member_codes, self.members = _categorical(names)
+        self.member_rows = rows[known]
+        self.member_codes = member_codes[known]
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def _status_mask(self, status):
+        if status not in self.statuses:
+            return np.zeros(len(self), dtype=bool)
+        return self.status_codes == self.statuses.index(status)
+
+    def overdue_mask(self, today):
+        """
+        Returns a boolean array marking the pending tasks whose due date has passed.
+
+        :param today: The date to compare against.
+        """
+        return self._status_mask("pending") & (self.due_dates < np.datetime64(today, "D"))
+
+    def due_within_mask(self, today, days):
+        """
+        Returns a boolean array marking the pending tasks due from today to `days` days from today.
+
+        :param today: The first day of the window.
+        :param days: The length of the window in days.
+        """
+        start = np.datetime64(today, "D")
+        return self._status_mask("pending") & (self.due_dates >= start) & (self.due_dates <= start + days)
+
+    def _count_by(self, codes, categories, masks):
+        counts = {name: np.bincount(codes, weights=mask, minlength=len(categories)) for name, mask in masks.items()}
+        counts["total"] = np.bincount(codes, minlength=len(categories))
+        return {category: {name: int(values[index]) for name, values in counts.items()}
+                for index, category in enumerate(categories)}
+
+    def summary(self, today=None, days=7):
+        """
+        Returns the analytics served by /tasks/analytics.
+
+        :param today: The date the overdue and upcoming tasks are counted against. Defaults to the current date.
+        :param days: The window of the upcoming tasks, in days.
+        """
+        today = today or date.today()
+        pending = self._status_mask("pending")
+        overdue = self.overdue_mask(today)
+        upcoming = self.due_within_mask(today, days)
+        masks = {"pending": pending, "overdue": overdue, "due_within": upcoming}
+
+        # The masks of the tasks, read at the row of every team member
+        member_masks = {name: mask[self.member_rows] for name, mask in masks.items()}
+        return {
+            "today": today.isoformat(),
+            "total": len(self),
+            "pending": int(pending.sum()),
+            "overdue": int(overdue.sum()),
+            "due_within_days": days,
+            "due_within": int(upcoming.sum()),
+            "by_status": {status: int(count) for status, count in
+                          zip(self.statuses, np.bincount(self.status_codes, minlength=len(self.statuses)))},
+            "by_priority": self._count_by(self.priority_codes, self.priorities, masks),
+            "by_member": self._count_by(self.member_codes, self.members, member_masks),
+        }
@@ -0,0 +1,127 @@
+from db import TASK_FIELDS
+
+# Request parsing and response formatting shared by the Flask server (server.py) and the asyncio server (async_server.py)
+
+# Largest page a client can request from /tasks/all
+MAX_PAGE_SIZE = 1000
+# Number of tasks read from the database and written to the client at a time by /tasks/export
+EXPORT_CHUNK_SIZE = 500
+# Number of results per page of /tasks/search unless the client asks for another limit
+SEARCH_PAGE_SIZE = 20
+# Days ahead /tasks/analytics counts as upcoming unless the client asks for another window, and the largest window
+ANALYTICS_DAYS = 7
+MAX_ANALYTICS_DAYS = 3660
+
+# Helper function for consistent response formatting
+def create_response(message, status, status_code, data=None):
+    return {
+        "message": message,
+        "status": status,
+        "status_code": status_code,
+        "data": data if data else []
+    }
+
+# Helper function to parse an optional integer query parameter, raises ValueError if it is not an integer
+def parse_int(value):
+    return int(value) if value is not None else None
+
+# Helper function to parse the optional `fields` projection, returns the fields and an error response if any are unknown
+def parse_fields(value):
+    if value is None:
+        return None, None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in TASK_FIELDS]
+    if unknown:
+        response = create_response(
+            f"Unknown fields: {', '.join(unknown)}. Allowed fields are: {', '.join(TASK_FIELDS)}.",
+            "error",
+            400
+        )
+        return None, response
+    return fields, None
+
+# Helper function to parse the limit/cursor pagination parameters, returns them and an error response if they are invalid
+def parse_page(limit, cursor):
+    try:
+        limit = parse_int(limit)
+        cursor = parse_int(cursor)
+    except ValueError:
+        return None, None, create_response("limit and cursor must be integers.", "error", 400)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return None, None, create_response(f"limit must be between 1 and {MAX_PAGE_SIZE}.", "error", 400)
+    return limit, cursor, None
+
+# Helper function to parse the /tasks/search parameters, returns the query, limit and offset and an error response if they are invalid
+def parse_search(query, limit, offset):
+    if not query or not query.strip():
+        return None, None, None, create_response("Provide a search query with the q parameter.", "error", 400)
+    try:
+        limit = parse_int(limit)
+        offset = parse_int(offset)
+    except ValueError:
+        return None, None, None, create_response("limit and offset must be integers.", "error", 400)
+    limit = SEARCH_PAGE_SIZE if limit is None else limit
+    offset = 0 if offset is None else offset
+    if not 0 < limit <= MAX_PAGE_SIZE or offset < 0:
+        return None, None, None, create_response(
+            f"limit must be between 1 and {MAX_PAGE_SIZE} and offset must not be negative.", "error", 400)
+    return query, limit, offset, None
+
+# Helper function to parse the `days` window of /tasks/analytics, returns it and an error response if it is invalid
+def parse_days(value):
+    try:
+        days = parse_int(value)
+    except ValueError:
+        return None, create_response("days must be an integer.", "error", 400)
+    days = ANALYTICS_DAYS if days is None else days
+    if not 0 <= days <= MAX_ANALYTICS_DAYS:
+        return None, create_response(f"days must be between 0 and {MAX_ANALYTICS_DAYS}.", "error", 400)
+    return days, None
+
+# Helper function to build the task data of a new task from the request body, returns it and an error response if fields are missing
+def new_task_data(data):
+    # Validate required fields
+    if not data or not isinstance(data, dict) or not all(k in data for k in ("title", "due_date", "flag")):
+        response = create_response(
+            "Missing required fields: title, due_date, flag.",
+            "error",
+            400
+        )
+        return None, response
+
+    task_data = {
+        "title": data.get("title"),
+        "due_date": data.get("due_date"),
+        "status": data.get("status", "pending"),
+        "description": data.get("description", ""),
+        "flag": data["flag"],
+        "priority": data.get("priority", "low"),
+        "teams": data.get("teams", []),
+    }
+    return task_data, None
+
+# Helper function to build the /tasks/all response. When a page was requested, the cursor of the next page is added
+def task_list_response(tasks, limit):
+    message = "Tasks retrieved successfully." if len(tasks) > 0 else "No tasks found."
+    response = create_response(
+        message,
+        "success",
+        200,
+        tasks
+    )
+    if limit is not None:
+        # A full page means there may be more tasks after it
+        response["next_cursor"] = tasks[-1]["task_id"] if len(tasks) == limit else None
+    return response
+
+# Helper function to build the response of /tasks/search, with the offset of the next page if there may be one
+def search_response(tasks, limit, offset):
+    message = "Tasks found." if len(tasks) > 0 else "No matching tasks found."
+    response = create_response(
+        message,
+        "success",
+        200,
+        tasks
+    )
+    response["next_offset"] = offset + limit if len(tasks) == limit else None
+    return response
@@ -0,0 +1,75 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+# This class represents an asyncio wrapper around TaskManagerDB. The blocking database calls run on a
+# small pool of worker threads, so the event loop never waits on SQLite.
+class AsyncTaskManagerDB:
+    def __init__(self, db, max_workers=None, max_pending=1024):
+        """
+        Initializes the wrapper.
+
+        :param db: The `TaskManagerDB` instance to wrap.
+        :param max_workers: The number of worker threads. Defaults to the connection pool size, so a
+        worker never waits for a connection.
+        :param max_pending: The maximum number of calls queued for the workers. Further calls wait on the
+        event loop until a place frees up, which keeps the executor queue bounded under load.
+        """
+        self.db = db
+        self.max_workers = max_workers or db.pool.max_size
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="task-db")
+        self._pending = asyncio.Semaphore(max_pending)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs a blocking function (a `TaskManagerDB` or `TaskManager` method) on a worker thread and returns its result.
+
+        :param func: The function to run.
+        """
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        """
+        Exposes every `TaskManagerDB` method as a coroutine, e.g. `await async_db.find_single_task(1)`.
+        """
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return call
+
+    async def iter_chunks(self, iterator, chunk_size):
+        """
+        Async generator over a blocking iterator (such as `TaskManagerDB.iter_tasks`). Each chunk of
+        `chunk_size` items is pulled on a worker thread.
+
+        :param iterator: The blocking iterator.
+        :param chunk_size: The number of items pulled per call.
+        """
+        def next_chunk():
+            chunk = []
+            for item in iterator:
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    break
+            return chunk
+
+        while True:
+            chunk = await self.run(next_chunk)
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+
+    def close(self):
+        """
+        Waits for the running calls to finish and closes the database connections.
+        """
+        self._executor.shutdown(wait=True)
+        self.db.close()
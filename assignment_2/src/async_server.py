@@ -0,0 +1,448 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import date
+from time import perf_counter
+from urllib.parse import parse_qs
+
+from api import (EXPORT_CHUNK_SIZE, create_response, new_task_data, parse_days, parse_fields, parse_int, parse_page,
+                 parse_search, search_response, task_list_response)
+from async_db import AsyncTaskManagerDB
+from db import TaskManagerDB
+from logs import setup_logging
+from metrics import METRICS, REQUEST_BUCKETS, add_cache_collectors
+from records import json_default
+from scheduler import OverdueScheduler, webhook_callback
+from task_manager import TaskManager
+
+logger = logging.getLogger(__name__)
+
+# asyncio (ASGI) variant of server.py. It serves the same routes with the same responses, but the handlers
+# are coroutines and all database work runs through AsyncTaskManagerDB, so one process can keep thousands
+# of slow or long-polling connections open. Run it with an ASGI server, e.g.:
+#   uvicorn async_server:app
+
+# JSON log lines on stderr, written by a background thread so the event loop never waits for the output.
+# TASK_LOG_LEVEL=DEBUG also logs every task added and listed
+log_listener = setup_logging()
+# Request latency and database metrics, served at /metrics (see metrics.py). Set TASK_METRICS=0 to turn
+# them off: requests are then not timed and the endpoint is not registered
+METRICS.enabled = os.environ.get("TASK_METRICS", "1") != "0"
+# WAL and relaxed syncing, see PRAGMA_PROFILES in db.py. Set TASK_WRITE_BEHIND=1 to have task writes
+# group committed by a single writer thread, see writer.py
+db = TaskManagerDB(pragmas="server", write_behind=os.environ.get("TASK_WRITE_BEHIND") == "1")
+db.migrate_db()  # Create missing tables and indexes and convert old due dates
+# Keeps the pending tasks in a heap ordered by due date and answers /tasks/overdue (see scheduler.py).
+# Set TASK_OVERDUE_WEBHOOK to a URL to have every task that becomes overdue POSTed to it
+scheduler = OverdueScheduler(db)
+if os.environ.get("TASK_OVERDUE_WEBHOOK"):
+    scheduler.add_callback(webhook_callback(os.environ["TASK_OVERDUE_WEBHOOK"]))
+scheduler.start()
+task_manager = TaskManager(db, scheduler)
+async_db = AsyncTaskManagerDB(db)
+if METRICS.enabled:
+    add_cache_collectors(db.cache)
+
+# Longest time (in seconds) a client can wait for a change with ?wait=
+MAX_WAIT = 60
+# How often (in seconds) the data version is checked while clients are waiting for a change
+POLL_INTERVAL = 0.5
+
+
+# This class represents an incoming HTTP request
+class Request:
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = {key: values[0] for key, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+        self.headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        self.body = body
+
+    """Function to decode the JSON body. Returns None if the body is empty or not valid JSON"""
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+# This class represents an outgoing HTTP response. `body` is either bytes or an async iterator of bytes.
+# A `content_type` of None sends no content-type header, e.g. for a 304 that has no body
+class Response:
+    def __init__(self, body=b"", status=200, content_type="application/json", etag=None):
+        self.body = body
+        self.status = status
+        self.headers = [(b"content-type", content_type.encode())] if content_type else []
+        if etag:
+            self.headers.append((b"etag", f'"{etag}"'.encode()))
+
+    async def send(self, send):
+        await send({"type": "http.response.start", "status": self.status, "headers": self.headers})
+        if isinstance(self.body, bytes):
+            await send({"type": "http.response.body", "body": self.body})
+            return
+        async for chunk in self.body:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+# Helper function to send a JSON payload, serialized like Flask's jsonify (sorted keys, compact, trailing newline)
+def json_response(payload, etag=None, status=200):
+    body = json.dumps(payload, default=json_default, sort_keys=True, separators=(",", ":")) + "\n"
+    return Response(body.encode(), status=status, etag=etag)
+
+
+# This class represents a watcher of the data version. While clients are long-polling, a single task
+# checks the version every POLL_INTERVAL seconds and wakes up all waiting clients when it changes,
+# so the number of waiting clients does not affect the load on the database.
+class VersionWatcher:
+    def __init__(self):
+        self._changed = None
+        self._version = None
+        self._waiters = 0
+        self._task = None
+
+    async def wait_for_change(self, version, timeout):
+        """
+        Waits until the data version is newer than `version`, at most `timeout` seconds.
+        Returns the new version, or None on timeout.
+        """
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        self._waiters += 1
+        try:
+            if self._task is None or self._task.done():
+                self._version = version
+                self._task = asyncio.create_task(self._poll())
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self._version > version), timeout)
+            return self._version
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters -= 1
+
+    async def _poll(self):
+        while self._waiters > 0:
+            await asyncio.sleep(POLL_INTERVAL)
+            result = await async_db.data_version()
+            if result["success"] and result["data"] > self._version:
+                async with self._changed:
+                    self._version = result["data"]
+                    self._changed.notify_all()
+
+
+version_watcher = VersionWatcher()
+
+
+# Helper function to check if an If-None-Match header contains the ETag
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == f'"{etag}"' for tag in tags)
+
+
+# Helper function for conditional GETs, see check_etag in server.py. With ?wait=<seconds> a client whose
+# data is current is held until the data changes (long polling) instead of getting a 304 straight away.
+async def check_etag(request, *parts):
+    version = await async_db.data_version()
+    if not version["success"]:
+        return None, None
+    etag = "-".join(str(part) for part in (version["data"],) + parts)
+    if not etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, None
+
+    try:
+        wait = min(max(parse_int(request.args.get("wait")) or 0, 0), MAX_WAIT)
+    except ValueError:
+        wait = 0
+    if wait and await version_watcher.wait_for_change(version["data"], wait) is not None:
+        # The data changed while waiting, send the new version
+        return await check_etag(request, *parts)
+    return etag, Response(status=304, content_type=None, etag=etag)
+
+
+ROUTES = []
+
+
+# Decorator registering a handler for a method and path. `<int:name>` segments are passed to the handler as ints
+def route(path, method):
+    pattern = re.compile("^" + re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)", path) + "$")
+
+    def decorator(handler):
+        ROUTES.append((method, path, pattern, handler))
+        return handler
+    return decorator
+
+
+# POST /tasks/new: Add a new task
+@route('/tasks/new', 'POST')
+async def create_task(request):
+    task_data, error = new_task_data(request.json())
+    if error:
+        return json_response(error)
+
+    # Save task
+    result = await async_db.run(task_manager.add_task, task_data)
+    if result["success"]:
+        response = create_response(
+            "Task added successfully",
+            "success",
+            201
+        )
+    else:
+        response = create_response(
+            result["message"],
+            "error",
+            400
+        )
+    return json_response(response)
+
+
+# POST /tasks/bulk: Add many tasks at once
+@route('/tasks/bulk', 'POST')
+async def create_tasks(request):
+    data = request.json()
+    if isinstance(data, dict):
+        data = data.get("tasks")
+    if not isinstance(data, list) or not data:
+        return json_response(create_response("Provide a non-empty list of tasks.", "error", 400))
+
+    try:
+        batch_size = parse_int(request.args.get("batch_size"))
+    except ValueError:
+        batch_size = 0
+    if batch_size is not None and batch_size < 1:
+        return json_response(create_response("batch_size must be a positive integer.", "error", 400))
+
+    result = await async_db.run(task_manager.add_tasks, data, batch_size=batch_size)
+    status = "success" if result["success"] else "error"
+    status_code = 201 if result["success"] else 400
+    return json_response(create_response(result["message"], status, status_code, result["data"]))
+
+
+# GET /tasks/all: Retrieve all tasks, with the same optional parameters as server.py
+@route('/tasks/all', 'GET')
+async def get_tasks(request):
+    etag, not_modified = await check_etag(request)
+    if not_modified:
+        return not_modified
+
+    limit, cursor, error = parse_page(request.args.get("limit"), request.args.get("cursor"))
+    if error:
+        return json_response(error)
+    fields, error = parse_fields(request.args.get("fields"))
+    if error:
+        return json_response(error)
+
+    tasks = await async_db.run(
+        task_manager.list_tasks,
+        flag=request.args.get("flag"),
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        status=request.args.get("status"),
+        priority=request.args.get("priority"),
+    )
+    return json_response(task_list_response(tasks, limit), etag)
+
+
+# GET /tasks/export: Stream all tasks as newline delimited JSON (one task per line)
+@route('/tasks/export', 'GET')
+async def export_tasks(request):
+    fields, error = parse_fields(request.args.get("fields"))
+    if error:
+        return json_response(error)
+    tasks = db.iter_tasks(
+        chunk_size=EXPORT_CHUNK_SIZE,
+        fields=fields,
+        flag=request.args.get("flag"),
+        status=request.args.get("status"),
+        priority=request.args.get("priority"),
+    )
+
+    async def generate():
+        try:
+            async for chunk in async_db.iter_chunks(tasks, EXPORT_CHUNK_SIZE):
+                yield ("\n".join(json.dumps(task, separators=(",", ":"), default=json_default) for task in chunk) + "\n").encode()
+        except sqlite3.Error as e:
+            yield (json.dumps({"error": f"Export aborted: {e}"}) + "\n").encode()
+
+    return Response(generate(), content_type="application/x-ndjson")
+
+
+# GET /tasks/search?q=<words>: Search the task titles and descriptions, see server.py
+@route('/tasks/search', 'GET')
+async def search_tasks(request):
+    query, limit, offset, error = parse_search(request.args.get("q"), request.args.get("limit"),
+                                               request.args.get("offset"))
+    if error:
+        return json_response(error)
+    fields, error = parse_fields(request.args.get("fields"))
+    if error:
+        return json_response(error)
+
+    etag, not_modified = await check_etag(request)
+    if not_modified:
+        return not_modified
+    result = await async_db.run(task_manager.search_tasks, query, limit=limit, offset=offset, fields=fields)
+    if not result["success"]:
+        return json_response(create_response(result["message"], "error", 500))
+    return json_response(search_response(result["data"], limit, offset), etag)
+
+
+# GET /tasks/find/<task_id>: Retrieve a task by ID
+@route('/tasks/find/<int:task_id>', 'GET')
+async def get_task_by_id(request, task_id):
+    etag, not_modified = await check_etag(request)
+    if not_modified:
+        return not_modified
+    task = await async_db.run(task_manager.find_task, task_id)
+    return json_response(task, etag)
+
+
+# UPDATE /tasks/update/<task_id>: update a task by ID
+@route('/tasks/update/<int:task_id>', 'PUT')
+async def update_task(request, task_id):
+    data = request.json()
+    if not data:
+        return json_response(create_response("No JSON data provided or invalid JSON format.", "error", 400))
+
+    # Check if the task exists
+    task = await async_db.run(task_manager.find_task, task_id)
+    if not task["success"]:
+        return json_response(task)
+    # Merge the existing task with the new data
+    updated_task = {**task["data"], **data}
+    result = await async_db.run(task_manager.update_task, task_id, updated_task)
+    return json_response(result)
+
+
+# DELETE /tasks/delete/<task_id>: Delete a task by ID
+@route('/tasks/delete/<int:task_id>', 'DELETE')
+async def delete_task(request, task_id):
+    return json_response(await async_db.run(task_manager.delete_task, task_id))
+
+
+# GET /tasks/pending: Retrieve all pending tasks
+@route('/tasks/pending', 'GET')
+async def get_pending_tasks(request):
+    etag, not_modified = await check_etag(request)
+    if not_modified:
+        return not_modified
+    tasks = await async_db.run(task_manager.get_pending_tasks)
+    if not tasks:
+        return json_response(create_response("No pending tasks found.", "error", 404), etag)
+    return json_response(create_response("Pending tasks retrieved successfully.", "success", 200, tasks), etag)
+
+
+# GET /tasks/overdue: Retrieve all overdue tasks
+@route('/tasks/overdue', 'GET')
+async def get_overdue_tasks(request):
+    # Tasks become overdue as days pass, so the date is part of the ETag
+    etag, not_modified = await check_etag(request, date.today().isoformat())
+    if not_modified:
+        return not_modified
+    tasks = await async_db.run(task_manager.get_overdue_tasks)
+    if not tasks:
+        return json_response(create_response("No overdue tasks found.", "error", 404), etag)
+    return json_response(create_response("Overdue tasks retrieved successfully.", "success", 200, tasks), etag)
+
+
+# GET /tasks/stats: Number of tasks per status, flag and priority, and number of overdue tasks
+@route('/tasks/stats', 'GET')
+async def get_task_stats(request):
+    etag, not_modified = await check_etag(request, date.today().isoformat())
+    if not_modified:
+        return not_modified
+    result = await async_db.run(task_manager.get_stats)
+    if not result["success"]:
+        return json_response(create_response(result["message"], "error", 500))
+    return json_response(create_response("Task statistics retrieved successfully.", "success", 200, result["data"]), etag)
+
+
+# GET /tasks/analytics: Overdue and upcoming pending tasks, and task counts per status, priority and team member
+@route('/tasks/analytics', 'GET')
+async def get_task_analytics(request):
+    days, error = parse_days(request.args.get("days"))
+    if error:
+        return json_response(error)
+    etag, not_modified = await check_etag(request, date.today().isoformat(), days)
+    if not_modified:
+        return not_modified
+    result = await async_db.run(task_manager.get_analytics, days)
+    if not result["success"]:
+        return json_response(create_response(result["message"], "error", 500))
+    return json_response(create_response("Task analytics retrieved successfully.", "success", 200, result["data"]), etag)
+
+
+if METRICS.enabled:
+    # GET /metrics: All metrics in the Prometheus text format
+    @route('/metrics', 'GET')
+    async def get_metrics(request):
+        return Response(METRICS.render().encode(), content_type="text/plain; version=0.0.4")
+
+
+# Helper function to read the whole request body
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+# The ASGI application
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                scheduler.stop()
+                async_db.close()  # Close the pooled connections on shutdown
+                log_listener.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    allowed = []
+    for method, path, pattern, handler in ROUTES:
+        match = pattern.match(scope["path"])
+        if not match:
+            continue
+        if method != scope["method"]:
+            allowed.append(method)
+            continue
+        start = perf_counter()
+        request = Request(scope, await read_body(receive))
+        params = {name: int(value) for name, value in match.groupdict().items()}
+        try:
+            response = await handler(request, **params)
+        except Exception:
+            # Answered in the shape of every other error instead of leaving the connection to the ASGI server
+            logger.exception("Unhandled error", extra={"path": scope["path"], "method": method})
+            response = json_response(create_response("Internal server error.", "error", 500), status=500)
+        await response.send(send)
+        if METRICS.enabled:
+            # Timed per route pattern until the whole body is sent, including streamed exports
+            labels = (("route", path), ("method", method), ("status", str(response.status)))
+            METRICS.observe("task_http_request_duration_seconds", perf_counter() - start, REQUEST_BUCKETS, labels)
+        return
+
+    if allowed:
+        await Response(b'{"message": "Method not allowed"}', status=405).send(send)
+    else:
+        await Response(b'{"message": "Not found"}', status=404).send(send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=5000)
@@ -0,0 +1,110 @@
+"""
+Load test comparing the Flask app (server.py) with the asyncio app (async_server.py).
+
+Both apps are started on local ports against the same database, then a number of concurrent clients
+send requests over plain HTTP/1.1 connections. Requires uvicorn for the asyncio app.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_async
+"""
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.datagen import populate
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_flask(app, port):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # No access log per request
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_asgi(app, port):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+    return stop
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def load(port, path, concurrency, requests):
+    """
+    Sends `requests` requests from `concurrency` concurrent clients and returns the latencies.
+    """
+    latencies = []
+    remaining = [requests]
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            status = await fetch(port, path)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else float("nan")
+
+
+def main(path="/tasks/pending", levels=(10, 100, 500), requests=2000):
+    sys.path.insert(0, SRC_DIR)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import server
+        import async_server
+        populate(server.db, 50)
+
+        flask_port, asgi_port = free_port(), free_port()
+        stops = [start_flask(server.app, flask_port), start_asgi(async_server.app, asgi_port)]
+        try:
+            print(f"{'app':>6} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'ok':>6}")
+            for concurrency in levels:
+                for name, port in (("flask", flask_port), ("asgi", asgi_port)):
+                    latencies, elapsed = asyncio.run(load(port, path, concurrency, requests))
+                    print(f"{name:>6} {concurrency:>8} {len(latencies) / elapsed:>8.0f} "
+                          f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+                          f"{len(latencies):>6}")
+        finally:
+            for stop in stops:
+                stop()
+            os.chdir(SRC_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cost of `TaskManager.load_task` with the lazily built tasks of `LazyTaskCollection` against the previous
+load path, which built a `WorkTask`/`PersonalTask` for every row and queried the members of every work
+task again. Also shows the cost of reading the plain rows, which reading a field of every task through
+the collection should stay close to.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_hydration
+"""
+import os
+import tempfile
+import time
+from collections import Counter
+
+from db import TaskManagerDB
+from task import PersonalTask, WorkTask
+from task_manager import TaskManager
+from benchmarks.datagen import populate
+
+
+def load_eagerly(db):
+    """
+    The previous load path: every task built up front, with one `fetch_members` call per work task.
+    """
+    tasks = []
+    for row in db.load_from_db()["data"]:
+        if row["flag"] == "work":
+            task = WorkTask(row["title"], row["due_date"])
+            for member in db.fetch_members(row["task_id"])["data"]:
+                task.add_team_member(f"{member[2]} {member[3]}")
+        else:
+            task = PersonalTask(row["title"], row["due_date"])
+        task._description = row["description"]
+        task.set_task_id(row["task_id"])
+        tasks.append(task)
+    return tasks
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(task_count=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TaskManagerDB(os.path.join(tmp, "bench.db"))
+        db.migrate_db()
+        populate(db, task_count)
+        task_manager = TaskManager(db)
+
+        rows_time, rows_counts = timed(lambda: Counter(row.status for row in db.load_from_db()["data"]))
+        eager_time, _ = timed(lambda: Counter(task.status for task in load_eagerly(db)))
+        lazy_time, lazy_counts = timed(lambda: Counter(task_manager.load_task().values("status")))
+        all_time, _ = timed(lambda: Counter(task.status for task in task_manager.load_task()))
+        assert rows_counts == lazy_counts
+
+        print(f"{task_count} tasks, counting the tasks per status")
+        print(f"{'path':<40} {'seconds':>8}")
+        print(f"{'plain rows (load_from_db)':<40} {rows_time:>8.3f}")
+        print(f"{'previous load_task (eager)':<40} {eager_time:>8.3f}")
+        print(f"{'load_task, values(status)':<40} {lazy_time:>8.3f}")
+        print(f"{'load_task, every task built':<40} {all_time:>8.3f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
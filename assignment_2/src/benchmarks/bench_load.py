@@ -0,0 +1,66 @@
+"""
+Benchmark of `TaskManagerDB.load_from_db` against the old N+1 load path.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_load
+"""
+import json
+import os
+import tempfile
+import time
+
+from db import TaskManagerDB, from_db_date
+from records import json_default
+from benchmarks.datagen import populate
+
+
+def load_n_plus_one(db):
+    """
+    The previous load path: one query for the tasks, then one `fetch_members` call per work task.
+    """
+    conn, cursor = db.connect_db()
+    try:
+        cursor.execute('''SELECT task_id, title, due_date, status, description, flag, priority FROM task_manager''')
+        tasks = []
+        for task_id, title, due_date, status, description, flag, priority in cursor.fetchall():
+            tasks.append({
+                "task_id": task_id, "title": title, "due_date": from_db_date(due_date), "status": status,
+                "description": description, "flag": flag, "priority": priority,
+                "teams": db.fetch_members(task_id)["data"] if flag == "work" else [],
+            })
+        return tasks
+    finally:
+        db.disconnect_db(conn, cursor)
+
+
+def timed(func, repeat=3):
+    """
+    Returns the best wall-clock time of `repeat` runs of `func`.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes=(1000, 10000, 50000)):
+    print(f"{'tasks':>8} {'n+1 (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = TaskManagerDB(os.path.join(tmp, "bench.db"))
+            db.create_task_table()
+            db.create_teams_table()
+            populate(db, size)
+
+            # Both paths must send the same JSON
+            assert json.dumps(load_n_plus_one(db)) == json.dumps(db.load_from_db()["data"], default=json_default)
+            old = timed(lambda: load_n_plus_one(db))
+            new = timed(lambda: db.load_from_db())
+            print(f"{size:>8} {old:>10.3f} {new:>12.3f} {old / new:>7.1f}x")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Latency of `GET /tasks/all` (Flask test client) with the previous `print()` output of `TaskManager`
+against the queued JSON logging of logs.py, at the default INFO level and with DEBUG records enabled.
+stdout and the log output are written to files, as with a server whose output is redirected.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_logging
+"""
+import atexit
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import populate
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def printing_task_manager(task_manager_class):
+    """
+    Returns a subclass of `TaskManager` with the previous `list_tasks`, which printed every listed task.
+    """
+    class PrintingTaskManager(task_manager_class):
+        def list_tasks(self, *args, **kwargs):
+            tasks = super().list_tasks(*args, **kwargs)
+            if not tasks:
+                print("There are no tasks!")
+            for task in tasks:
+                print(task)
+            print("\n")
+            return tasks
+    return PrintingTaskManager
+
+
+def measure(client, path, requests):
+    """
+    Sends `requests` requests and returns the latencies in milliseconds.
+    """
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return latencies
+
+
+def main(task_count=10_000, path="/tasks/all", requests=50):
+    sys.path.insert(0, SRC_DIR)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            import server
+            from logs import setup_logging
+            from task_manager import TaskManager
+            populate(server.db, task_count)
+            client = server.app.test_client()
+
+            # Write the logs to a file instead of stderr
+            server.log_listener.stop()
+            atexit.unregister(server.log_listener.stop)
+            log_file = open(os.path.join(tmp, "server.log"), "w")
+            stdout_file = open(os.path.join(tmp, "stdout.txt"), "w")
+            listener = setup_logging("INFO", log_file)
+
+            variants = (
+                ("print (before)", printing_task_manager(TaskManager), "INFO"),
+                ("logging INFO", TaskManager, "INFO"),
+                ("logging DEBUG", TaskManager, "DEBUG"),
+            )
+            print(f"{task_count} tasks, {requests} requests to {path}")
+            print(f"{'variant':<16} {'mean ms':>8} {'p50 ms':>8} {'max ms':>8}")
+            for name, task_manager_class, level in variants:
+                server.task_manager = task_manager_class(server.db, server.scheduler)
+                logging.getLogger().setLevel(level)
+                with contextlib.redirect_stdout(stdout_file):
+                    measure(client, path, 3)  # Warm up
+                    latencies = measure(client, path, requests)
+                print(f"{name:<16} {statistics.mean(latencies):>8.1f} {statistics.median(latencies):>8.1f} "
+                      f"{max(latencies):>8.1f}")
+            listener.stop()
+            log_file.close()
+            stdout_file.close()
+            server.scheduler.stop()
+            server.db.close()
+        finally:
+            os.chdir(SRC_DIR)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Memory benchmark of loading 1M tasks with `load_from_db`, against the previous representation
+(one dictionary per task and a plain tuple per team member).
+
+Run from the `src` directory:
+    python -m benchmarks.bench_memory
+"""
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from db import TASK_COLUMNS, TaskManagerDB, from_db_date
+from benchmarks.datagen import populate
+
+
+def load_dicts(db):
+    """
+    The previous load path: the same queries, but every task is built as a dictionary.
+    """
+    conn, cursor = db.connect_db()
+    try:
+        cursor.execute(f'''SELECT {TASK_COLUMNS} FROM task_manager''')
+        tasks = cursor.fetchall()
+        cursor.execute('''SELECT team_id, task_id, first_name, last_name FROM teams ORDER BY task_id, team_id''')
+        teams = {}
+        for row in cursor.fetchall():
+            teams.setdefault(row[1], []).append(tuple(row))
+        return [{"task_id": task_id, "title": title, "due_date": from_db_date(due_date), "status": status,
+                 "description": description, "flag": flag, "priority": priority,
+                 "teams": teams.get(task_id, []) if flag == "work" else []}
+                for task_id, title, due_date, status, description, flag, priority in tasks]
+    finally:
+        db.disconnect_db(conn, cursor)
+
+
+def measure(func):
+    """
+    Runs `func` and returns the memory (in MB) still held by its result, its peak memory and its run time.
+    The times include the overhead of tracemalloc.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2 ** 20, peak / 2 ** 20, elapsed
+
+
+def main(task_count=1_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TaskManagerDB(os.path.join(tmp, "bench.db"))
+        db.create_task_table()
+        db.create_teams_table()
+        populate(db, task_count)
+
+        print(f"{task_count} tasks")
+        print(f"{'representation':<12} {'held (MB)':>10} {'peak (MB)':>10} {'time (s)':>9}")
+        for name, load in (("dict", lambda: load_dicts(db)), ("TaskRecord", lambda: db.load_from_db()["data"])):
+            held, peak, elapsed = measure(load)
+            print(f"{name:<12} {held:>10.1f} {peak:>10.1f} {elapsed:>9.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of mixed read/write throughput under each pragma profile in `PRAGMA_PROFILES`.
+
+Reader threads page through `/tasks/all`-style queries while writer threads add tasks.
+
+Run from the `src` directory:
+    python -m benchmarks.bench_pragmas
+"""
+import os
+import tempfile
+import threading
+import time
+
+from db import PRAGMA_PROFILES, TaskManagerDB
+from benchmarks.datagen import populate
+
+
+def run_profile(profile, readers=4, writers=2, duration=3.0, task_count=5000):
+    """
+    Runs the mixed workload against a fresh database and returns the operation counts.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TaskManagerDB(os.path.join(tmp, "bench.db"), pool_size=readers + writers, pragmas=profile)
+        db.migrate_db()
+        populate(db, task_count)
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def reader():
+            done = errors = 0
+            while time.perf_counter() < deadline:
+                if db.load_from_db(limit=100, status="pending")["success"]:
+                    done += 1
+                else:
+                    errors += 1
+            with lock:
+                counts["reads"] += done
+                counts["errors"] += errors
+
+        def writer():
+            done = errors = 0
+            task = {"title": "Benchmark write", "due_date": "2024/12/12", "status": "pending",
+                    "description": "", "flag": "work", "priority": "low",
+                    "teams": [{"first_name": "First", "last_name": "Last"}]}
+            while time.perf_counter() < deadline:
+                if db.save_to_db(task)["success"]:
+                    done += 1
+                else:
+                    errors += 1
+            with lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        db.close()
+    return counts
+
+
+def main(duration=3.0):
+    print(f"{'profile':>10} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    for profile in PRAGMA_PROFILES:
+        counts = run_profile(profile, duration=duration)
+        print(f"{profile:>10} {counts['reads'] / duration:>10.0f} {counts['writes'] / duration:>10.0f} {counts['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic task data for the benchmarks.
+
+`generate_tasks` yields tasks in the API format (as sent to `POST /tasks/new`) with a configurable mix of
+work and personal tasks, team sizes and due dates around today; `populate` saves them to a database.
+The data only depends on the seed, so runs on different commits use the same tasks.
+"""
+import random
+from datetime import date, timedelta
+
+from db import DATE_FORMAT
+
+FIRST_NAMES = ("Anna", "Bence", "Chen", "Daniel", "Eva", "Farah", "Gergo", "Hana", "Ivan", "Julia",
+               "Kipchirchir", "Lea", "Mate", "Nora", "Omar", "Petra", "Raphael", "Sara", "Tamas", "Zsofia")
+LAST_NAMES = ("Balogh", "Doe", "Farkas", "Horvath", "Kiss", "Kovacs", "Molnar", "Nagy", "Nemeth", "Otieno",
+              "Papp", "Smith", "Szabo", "Takacs", "Toth", "Varga")
+WORDS = ("report", "meeting", "review", "budget", "design", "deploy", "client", "invoice", "laundry", "groceries",
+         "documentation", "presentation", "dentist", "backup", "release", "interview", "workshop", "planning",
+         "database", "server", "migration", "training", "survey", "contract", "newsletter", "garden")
+# (value, weight) pairs the statuses and priorities are drawn from
+STATUSES = (("pending", 6), ("in progress", 2), ("completed", 2))
+PRIORITIES = (("low", 5), ("medium", 3), ("high", 2))
+
+
+def _choose(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+def generate_tasks(count, work_ratio=0.5, team_size=(1, 5), overdue_ratio=0.2, seed=0, today=None):
+    """
+    Yields `count` synthetic tasks as dictionaries in the API format.
+
+    :param count: The number of tasks.
+    :param work_ratio: The share of work tasks; the others are personal tasks.
+    :param team_size: The smallest and largest number of team members of a work task.
+    :param overdue_ratio: The share of tasks whose due date is in the past. The others are due today or later.
+    :param seed: The seed of the random generator.
+    :param today: The date the due dates are relative to. Defaults to today.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    for _ in range(count):
+        flag = "work" if rng.random() < work_ratio else "personal"
+        if rng.random() < overdue_ratio:
+            due_date = today - timedelta(days=rng.randint(1, 365))
+        else:
+            due_date = today + timedelta(days=rng.randint(0, 365))
+        teams = []
+        if flag == "work":
+            teams = [{"first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES)}
+                     for _ in range(rng.randint(*team_size))]
+        yield {
+            "title": " ".join(rng.sample(WORDS, 3)).capitalize(),
+            "due_date": due_date.strftime(DATE_FORMAT),
+            "status": _choose(rng, STATUSES),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(4, 12))),
+            "flag": flag,
+            "priority": _choose(rng, PRIORITIES),
+            "teams": teams,
+        }
+
+
+def populate(db, count, chunk_size=10000, **options):
+    """
+    Saves `count` generated tasks to a database whose tables exist, using `save_many_to_db` in chunks of
+    `chunk_size` tasks. Returns the IDs of the saved tasks.
+
+    :param db: The `TaskManagerDB` to fill.
+    :param count: The number of tasks.
+    :param options: Passed on to `generate_tasks`.
+    """
+    task_ids = []
+    tasks = generate_tasks(count, **options)
+    while len(task_ids) < count:
+        chunk = [task for _, task in zip(range(chunk_size), tasks)]
+        result = db.save_many_to_db(chunk)
+        if not result["success"]:
+            raise RuntimeError(result["message"])
+        task_ids.extend(result["data"]["task_ids"])
+    return task_ids
@@ -0,0 +1,244 @@
+"""
+Benchmark suite: micro-benchmarks of the `TaskManagerDB` methods and end-to-end benchmarks of the
+`server.py` routes through Flask's test client, on a synthetic dataset (see datagen.py).
+
+The results are written as JSON. Pass the results of an earlier run with --compare to list the
+benchmarks whose median got slower by more than --threshold; the exit status is 1 if there are any.
+
+Run from the `src` directory:
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+from benchmarks.datagen import generate_tasks, populate
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Median slowdown (as a fraction) above which a benchmark counts as a regression
+DEFAULT_THRESHOLD = 0.2
+# Smallest slowdown (in ms) counted as a regression, so timer noise on the fastest calls is not reported
+MIN_DELTA_MS = 0.05
+# Untimed calls made before a benchmark is timed
+WARMUP_RUNS = 2
+
+
+def run_benchmark(func, runs, warmup=WARMUP_RUNS):
+    """
+    Calls `func` `runs` times after `warmup` untimed calls and returns the statistics of the run times in ms.
+    Like `timeit`, the garbage collector is off while timing so its pauses do not land on random calls.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+    times.sort()
+    return {
+        "runs": runs,
+        "mean_ms": statistics.mean(times),
+        "median_ms": statistics.median(times),
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "min_ms": times[0],
+    }
+
+
+def db_benchmarks(db, task_ids, scheduler, runs, seed):
+    """
+    Returns the micro-benchmarks of the `TaskManagerDB` methods as `(name, function, runs)`. Benchmarks
+    loading all tasks run a tenth as often. Writes change a different task (or add a new one) on every call.
+    """
+    today = date.today()
+    some_ids = itertools.cycle(task_ids[::max(1, len(task_ids) // 1000)])
+    new_tasks = generate_tasks(10 * runs + 100, seed=seed + 1)
+    updates = generate_tasks(10 * runs + 100, seed=seed + 2)
+    updated_ids = itertools.cycle(task_ids[:len(task_ids) // 2])
+    deleted_ids = iter(reversed(task_ids))  # From the end, so the updates never hit a deleted task
+    first_id = task_ids[0]
+    page_ids = task_ids[:100]
+    slow_runs = max(3, runs // 10)
+    # The bulk import takes 100 new tasks on every call, including the warm-up calls
+    bulk_tasks = generate_tasks((slow_runs + WARMUP_RUNS) * 100, seed=seed + 4)
+
+    def save_many():
+        batch = list(itertools.islice(bulk_tasks, 100))
+        assert len(batch) == 100, "ran out of tasks for db.save_many_to_db"
+        return db.save_many_to_db(batch)
+
+    return [
+        ("db.load_from_db", lambda: db.load_from_db(), slow_runs),
+        ("db.load_from_db(limit=100)", lambda: db.load_from_db(limit=100), runs),
+        ("db.load_from_db(fields=title,status)", lambda: db.load_from_db(fields=["title", "status"]), slow_runs),
+        ("db.load_from_db(status=pending,limit=100)", lambda: db.load_from_db(limit=100, status="pending"), runs),
+        ("db.iter_tasks", lambda: sum(1 for _ in db.iter_tasks()), slow_runs),
+        ("db.find_single_task", lambda: db.find_single_task(next(some_ids)), runs),
+        ("db.find_single_task(cached)", lambda: db.find_single_task(first_id), runs),
+        ("db.fetch_tasks_by_id(100)", lambda: db.fetch_tasks_by_id(page_ids), runs),
+        ("db.fetch_members", lambda: db.fetch_members(next(some_ids)), runs),
+        ("db.fetch_pending_tasks", lambda: db.fetch_pending_tasks(), slow_runs),
+        ("db.fetch_overdue_tasks", lambda: db.fetch_overdue_tasks(today), slow_runs),
+        ("scheduler.overdue_task_ids", lambda: scheduler.overdue_task_ids(today), runs),
+        ("db.fetch_stats", lambda: db.fetch_stats(today), runs),
+        ("db.search_tasks", lambda: db.search_tasks("client review"), runs),
+        ("db.data_version", lambda: db.data_version(), runs),
+        ("db.save_to_db", lambda: db.save_to_db(next(new_tasks)), runs),
+        ("db.save_many_to_db(100)", save_many, slow_runs),
+        ("db.update_in_db", lambda: db.update_in_db(next(updated_ids), next(updates)), runs),
+        ("db.delete_from_db", lambda: db.delete_from_db(next(deleted_ids)), runs),
+    ]
+
+
+def http_benchmarks(client, task_ids, runs, seed):
+    """
+    Returns the end-to-end benchmarks of the routes as `(name, function, runs)`.
+    """
+    some_ids = itertools.cycle(task_ids[::max(1, len(task_ids) // 1000)])
+    new_tasks = generate_tasks(10 * runs + 100, seed=seed + 3)
+    updated_ids = itertools.cycle(task_ids[:len(task_ids) // 2])
+    slow_runs = max(3, runs // 10)
+
+    def get(path):
+        response = client.get(path)
+        assert response.status_code in (200, 304), path
+        return response
+
+    return [
+        ("GET /tasks/all", lambda: get("/tasks/all"), slow_runs),
+        ("GET /tasks/all?limit=100", lambda: get("/tasks/all?limit=100"), runs),
+        ("GET /tasks/all?fields=title,status&limit=100", lambda: get("/tasks/all?fields=title,status&limit=100"), runs),
+        ("GET /tasks/find/<id>", lambda: get(f"/tasks/find/{next(some_ids)}"), runs),
+        ("GET /tasks/pending", lambda: get("/tasks/pending"), slow_runs),
+        ("GET /tasks/overdue", lambda: get("/tasks/overdue"), slow_runs),
+        ("GET /tasks/stats", lambda: get("/tasks/stats"), runs),
+        ("GET /tasks/search", lambda: get("/tasks/search?q=client+review"), runs),
+        ("POST /tasks/new", lambda: client.post("/tasks/new", json=next(new_tasks)), runs),
+        ("PUT /tasks/update/<id>", lambda: client.put(f"/tasks/update/{next(updated_ids)}",
+                                                      json={"status": "completed", "priority": "high"}), runs),
+    ]
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True,
+                                text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(task_count, runs, work_ratio, seed, include_http=True):
+    """
+    Builds the dataset in a temporary directory and runs every benchmark. Returns the results document.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # The server module opens manager.db in the working directory, so it serves the generated data
+            import server
+
+            db = server.db
+            task_ids = populate(db, task_count, work_ratio=work_ratio, seed=seed)
+            server.scheduler.seed()  # The tasks were saved past the task manager
+
+            benchmarks = db_benchmarks(db, task_ids, server.scheduler, runs, seed)
+            if include_http:
+                benchmarks += http_benchmarks(server.app.test_client(), task_ids, runs, seed)
+            for name, func, benchmark_runs in benchmarks:
+                results[name] = run_benchmark(func, benchmark_runs)
+                print(f"{name:<48} {results[name]['median_ms']:>10.3f} ms", file=sys.stderr)
+            metrics = server.METRICS.enabled
+            server.scheduler.stop()
+            db.close()
+        finally:
+            os.chdir(SRC_DIR)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "tasks": task_count,
+            "work_ratio": work_ratio,
+            "seed": seed,
+            "metrics": metrics,  # Whether the server's request and query metrics were recorded
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Prints the change of the median of every benchmark in both documents and returns the names of
+    the benchmarks that got slower by more than `threshold` (and at least `MIN_DELTA_MS`).
+    """
+    regressions = []
+    print(f"{'benchmark':<48} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = ""
+        if change > threshold and result["median_ms"] - before["median_ms"] >= MIN_DELTA_MS:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<48} {before['median_ms']:>10.3f} {result['median_ms']:>10.3f} {change:>+8.1%}{flag}")
+    if baseline["meta"].get("tasks") != current["meta"].get("tasks"):
+        print("Warning: the runs used different numbers of tasks")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000, help="number of generated tasks (default 10000)")
+    parser.add_argument("--runs", type=int, default=100, help="timed calls per benchmark (default 100)")
+    parser.add_argument("--work-ratio", type=float, default=0.5, help="share of work tasks (default 0.5)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the data generator (default 0)")
+    parser.add_argument("--no-http", action="store_true", help="skip the end-to-end benchmarks")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the results")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="median slowdown counted as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    if args.tasks < 4 * (args.runs + 2):
+        parser.error("--tasks must be at least 4 times --runs + 2, so every write benchmark has its own tasks")
+
+    sys.path.insert(0, SRC_DIR)
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    document = run_suite(args.tasks, args.runs, args.work_ratio, args.seed, include_http=not args.no_http)
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline is not None and compare(baseline, document, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Longest time (in seconds) `needs_sync` lets pass before the data version is read again
+VERSION_CHECK_INTERVAL = 0.1
+
+
+# This class represents a thread-safe LRU cache of task records with a time-to-live, keyed by task_id.
+# Writes made by this process drop the tasks they change (`invalidate`). Writes made by other processes are
+# noticed from the data version of the database, which `sync` compares with the versions this process
+# committed; the whole cache is dropped then, since it is not known which tasks were written.
+class TaskCache:
+    def __init__(self, max_size=1024, ttl=30.0, check_interval=VERSION_CHECK_INTERVAL):
+        """
+        Initializes an empty cache.
+
+        :param max_size: The maximum number of tasks kept. The least recently used task is evicted first.
+        A size of 0 disables the cache.
+        :param ttl: The number of seconds a cached task stays valid.
+        :param check_interval: How often (in seconds) the data version is compared, see `needs_sync`.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0  # Bumped by every invalidation
+        self._data_version = None  # Data version of the database the cached tasks were loaded at
+        self._local_versions = set()  # Newer data versions committed by this process
+        self._checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self):
+        """
+        Returns the invalidation counter. Read it before loading a task from the database and pass it to
+        `put`, so a task loaded before a concurrent write is not cached after that write invalidated it.
+        """
+        return self._version
+
+    def needs_sync(self):
+        """
+        Returns whether `check_interval` seconds have passed since the last `sync`.
+        """
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def committed(self, data_version):
+        """
+        Records a data version committed by this process. Its writes invalidate the tasks they change
+        themselves, so reaching this version does not make `sync` drop the cache.
+
+        :param data_version: The version returned by `TaskManagerDB._bump_version`.
+        """
+        with self._lock:
+            if self._data_version is not None and data_version > self._data_version:
+                self._local_versions.add(data_version)
+
+    def sync(self, data_version):
+        """
+        Brings the cache up to a data version of the database. If a version between the one the cached tasks were
+        loaded at and this one was committed by another process, every task is dropped.
+
+        :param data_version: The current data version, as returned by `TaskManagerDB.data_version`.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            known = self._data_version
+            if known is not None and data_version <= known:
+                return  # Nothing new, or read before an earlier `sync`
+            local = known is not None and all(version in self._local_versions
+                                              for version in range(known + 1, data_version + 1))
+            if not local:
+                self._version += 1
+                self._entries.clear()
+            self._local_versions = {version for version in self._local_versions if version > data_version}
+            self._data_version = data_version
+
+    def get(self, task_id):
+        """
+        Returns a copy of the cached task, or None on a miss.
+
+        :param task_id: The ID of the task.
+        """
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(task_id)
+                self.hits += 1
+                return self._copy(entry[0])
+            if entry is not None:
+                del self._entries[task_id]  # Expired
+            self.misses += 1
+            return None
+
+    def put(self, task_id, task, version):
+        """
+        Caches a task.
+
+        :param task_id: The ID of the task.
+        :param task: The task (a `TaskRecord` or a dictionary).
+        :param version: The value of `version()` read before the task was loaded.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                return  # A write happened while the task was being loaded
+            self._entries[task_id] = (self._copy(task), time.monotonic() + self.ttl)
+            self._entries.move_to_end(task_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, task_id, data_version=None):
+        """
+        Drops a task from the cache. Called by every write to the task or its team.
+
+        :param task_id: The ID of the task.
+        :param data_version: The data version the write was committed at, see `committed`.
+        """
+        with self._lock:
+            self._version += 1
+            self._entries.pop(task_id, None)
+        if data_version is not None:
+            self.committed(data_version)
+
+    def clear(self):
+        """
+        Drops every task from the cache.
+        """
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the hit/miss statistics of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+            }
+
+    @staticmethod
+    def _copy(task):
+        """
+        Copies a task so callers can modify what they get without touching the cached version.
+        """
+        task = task.copy()
+        if "teams" in task:
+            task["teams"] = list(task["teams"])
+        return task
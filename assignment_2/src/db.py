@@ -1,8 +1,173 @@
 import sqlite3
+from datetime import datetime
+from cache import TaskCache
+from metrics import METRICS, InstrumentedCursor
+from pool import ConnectionPool
+from records import NO_TEAM, TaskRecord, TeamMember
+from statements import (STATEMENT_CACHE_SIZE, STATS_DIMENSIONS, TASK_COLUMNS, count_stats_sql, in_list,
+                        select_tasks_sql, select_teams_in_sql, sql)
+from writer import GroupCommitWriter
+
+# Number of task IDs bound into a single `IN (...)` query when fetching team members
+TEAM_BATCH_SIZE = 500
+# Number of tasks inserted per `executemany` call by `save_many_to_db`
+BULK_BATCH_SIZE = 1000
+# Fields a task needs before it can be saved
+REQUIRED_TASK_FIELDS = ("title", "due_date", "flag")
+
+DATE_FORMAT = '%Y/%m/%d'  # Format used by the API and the task classes
+DB_DATE_FORMAT = '%Y-%m-%d'  # Sortable ISO format the due dates are stored in
+
+# Connection settings applied by the pool to every new connection
+PRAGMA_PROFILES = {
+    # sqlite3 defaults: rollback journal, synchronous=FULL, small page cache
+    "default": {},
+    # For the server: with WAL readers and the writer no longer block each other, and synchronous=NORMAL
+    # only syncs at checkpoints (a power loss can drop the last commits but never corrupts the database)
+    "server": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # 64 MB
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+    # WAL concurrency, but every commit is synced to disk
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+# Triggers keeping the counters read by `fetch_stats` up to date. `task_stats` counts the tasks per status, flag
+# and priority, and `pending_due_counts` counts the pending tasks per due date. Being triggers, they also cover
+# bulk imports and any other program writing to the database.
+STATS_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS task_stats_insert AFTER INSERT ON task_manager BEGIN
+        INSERT INTO task_stats (dimension, value, count)
+            VALUES ('status', NEW.status, 1), ('flag', NEW.flag, 1), ('priority', IFNULL(NEW.priority, 'none'), 1)
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+        INSERT INTO pending_due_counts (due_date, count) SELECT NEW.due_date, 1 WHERE NEW.status = 'pending'
+            ON CONFLICT (due_date) DO UPDATE SET count = count + 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS task_stats_delete AFTER DELETE ON task_manager BEGIN
+        UPDATE task_stats SET count = count - 1
+            WHERE (dimension = 'status' AND value = OLD.status) OR (dimension = 'flag' AND value = OLD.flag)
+               OR (dimension = 'priority' AND value = IFNULL(OLD.priority, 'none'));
+        UPDATE pending_due_counts SET count = count - 1 WHERE OLD.status = 'pending' AND due_date = OLD.due_date;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS task_stats_update AFTER UPDATE OF status, flag, priority, due_date ON task_manager
+    BEGIN
+        UPDATE task_stats SET count = count - 1
+            WHERE (dimension = 'status' AND value = OLD.status) OR (dimension = 'flag' AND value = OLD.flag)
+               OR (dimension = 'priority' AND value = IFNULL(OLD.priority, 'none'));
+        UPDATE pending_due_counts SET count = count - 1 WHERE OLD.status = 'pending' AND due_date = OLD.due_date;
+        INSERT INTO task_stats (dimension, value, count)
+            VALUES ('status', NEW.status, 1), ('flag', NEW.flag, 1), ('priority', IFNULL(NEW.priority, 'none'), 1)
+            ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+        INSERT INTO pending_due_counts (due_date, count) SELECT NEW.due_date, 1 WHERE NEW.status = 'pending'
+            ON CONFLICT (due_date) DO UPDATE SET count = count + 1;
+    END''',
+)
+
+# Triggers mirroring the title and description of every task into the `task_fts` full-text index
+SEARCH_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task_manager BEGIN
+        INSERT INTO task_fts (rowid, title, description) VALUES (NEW.task_id, NEW.title, NEW.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task_manager BEGIN
+        INSERT INTO task_fts (task_fts, rowid, title, description) VALUES ('delete', OLD.task_id, OLD.title, OLD.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS task_fts_update AFTER UPDATE OF title, description ON task_manager BEGIN
+        INSERT INTO task_fts (task_fts, rowid, title, description) VALUES ('delete', OLD.task_id, OLD.title, OLD.description);
+        INSERT INTO task_fts (rowid, title, description) VALUES (NEW.task_id, NEW.title, NEW.description);
+    END''',
+)
+# Number of data versions the `task_changes` log covers. A reader that is further behind than that (see
+# `fetch_task_changes`) has to read the tasks again instead.
+CHANGE_LOG_VERSIONS = 10000
+# Triggers logging the ID of every task whose due date or status is written, with the data version the write
+# is committed at (the version is bumped at the end of the transaction, so that is the current one plus one).
+# Older entries are pruned whenever the version is bumped.
+CHANGE_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS task_changes_insert AFTER INSERT ON task_manager BEGIN
+        INSERT OR IGNORE INTO task_changes (version, task_id) SELECT version + 1, NEW.task_id FROM db_version WHERE id = 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS task_changes_delete AFTER DELETE ON task_manager BEGIN
+        INSERT OR IGNORE INTO task_changes (version, task_id) SELECT version + 1, OLD.task_id FROM db_version WHERE id = 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS task_changes_update AFTER UPDATE OF due_date, status ON task_manager BEGIN
+        INSERT OR IGNORE INTO task_changes (version, task_id) SELECT version + 1, NEW.task_id FROM db_version WHERE id = 1;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS task_changes_prune AFTER UPDATE OF version ON db_version BEGIN
+        DELETE FROM task_changes WHERE version <= NEW.version - {CHANGE_LOG_VERSIONS};
+    END''',
+)
+
+# Weights of the title and the description when search results are ranked with bm25
+SEARCH_RANK = "bm25(10.0, 1.0)"
+
+# Fields a caller can project a task onto. `task_id` is always returned since it doubles as the page cursor
+TASK_FIELDS = TaskRecord.__slots__
+# The fields stored in the `task_manager` table, i.e. all of them except the team members
+COLUMN_FIELDS = frozenset(TASK_COLUMNS.split(", "))
+
+
+def to_db_date(due_date):
+    """
+    Converts a `YYYY/MM/DD` due date to the ISO form it is stored in. Values in any other format are kept as they are.
+
+    :param due_date: The due date as received from the API.
+    """
+    try:
+        return datetime.strptime(due_date, DATE_FORMAT).strftime(DB_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return due_date
+
+
+def from_db_date(due_date):
+    """
+    Converts a stored ISO due date back to the `YYYY/MM/DD` format used by the API.
+
+    :param due_date: The due date as stored in the database.
+    """
+    if isinstance(due_date, str) and len(due_date) == 10 and due_date[4] == '-' and due_date[7] == '-':
+        return due_date.replace('-', '/')
+    return due_date
+
+
+def member_name(member):
+    """
+    Extracts `(first_name, last_name)` from a team member given either as a dictionary or as a tuple/list
+    whose last two items are the names (such as the rows returned by `fetch_members`).
+
+    :param member: The team member.
+    :return: The names, or None if the member has an unexpected shape.
+    """
+    if isinstance(member, dict):
+        return member.get("first_name"), member.get("last_name")
+    if isinstance(member, (tuple, list)) and len(member) >= 2:
+        first_name, last_name = member[-2:]
+        return first_name, last_name
+    return None
+
+
+def normalize_status(status):
+    """
+    Stores statuses trimmed and in lower case so they can be matched by an index.
+
+    :param status: The status as received from the API.
+    """
+    return status.strip().lower() if isinstance(status, str) else status
+
 
 # This class represents a database for managing tasks.
 class TaskManagerDB:
-    def __init__(self, db_name = 'manager.db'):
+    def __init__(self, db_name = 'manager.db', pool_size = 5, pragmas = "default", cache_size = 1024, cache_ttl = 30.0,
+                 write_behind = False):
         """
         This is a Python constructor function that initializes an object with a specified database name.
         
@@ -10,20 +175,43 @@ class TaskManagerDB:
         initializing new objects. In this case, the `__init__` method takes a parameter `db_name`, which
         is the name of a database that the class will interact with. This parameter allows you to
         specify the name of the database you want to connect to
+        :param pool_size: The maximum number of connections the pool keeps open at the same time.
+        Connections are reused across calls instead of being opened and closed every time.
+        :param pragmas: The name of a profile in `PRAGMA_PROFILES`, or a dictionary of pragmas, applied
+        to every connection when it is opened.
+        :param cache_size: The number of tasks `find_single_task` keeps in its LRU cache (0 disables the cache).
+        :param cache_ttl: The number of seconds a cached task stays valid.
+        :param write_behind: If True, saving, updating and deleting a task is done by a single writer thread
+        that commits the writes of concurrent callers together (group commit). Each call still blocks until
+        its own write is committed. See `GroupCommitWriter` in writer.py.
         """
         self.db_name = db_name
+        if isinstance(pragmas, str):
+            if pragmas not in PRAGMA_PROFILES:
+                raise ValueError(f"Unknown pragma profile '{pragmas}'. Available profiles: {', '.join(PRAGMA_PROFILES)}")
+            pragmas = PRAGMA_PROFILES[pragmas]
+        self.pool = ConnectionPool(db_name, max_size=pool_size, pragmas=pragmas,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+        self.cache = TaskCache(max_size=cache_size, ttl=cache_ttl)
+        self.writer = GroupCommitWriter(self) if write_behind else None
 
     def connect_db(self):
         """
-        This function is used to connect to a database.
+        This function is used to connect to a database. The connection is borrowed from the pool,
+        so nested calls in the same thread share one connection. While metrics are enabled the cursor
+        times and counts every statement it runs (see metrics.py).
         """
-        conn = sqlite3.connect(self.db_name)
+        conn = self.pool.acquire()
+        if METRICS.enabled:
+            METRICS.inc("task_db_checkouts_total")
+            return conn, conn.cursor(InstrumentedCursor)
         cursor = conn.cursor()
         return conn, cursor
 
     def disconnect_db(self, conn, cursor):
         """
-        This function is used to disconnect from a database by closing the connection and cursor.
+        This function is used to disconnect from a database by closing the cursor and handing the
+        connection back to the pool.
         
         :param conn: The `conn` parameter typically refers to the database connection object that is
         used to connect to a database. It holds the connection information such as the database server
@@ -33,16 +221,61 @@ class TaskManagerDB:
         statements to the database and retrieve data from the database result sets
         """
         cursor.close()
-        conn.close()
+        self.pool.release(conn)
+        if METRICS.enabled:
+            METRICS.inc("task_db_checkins_total")
         return {"success": True, "message": "Database connection closed successfully", "data": []}
 
+    def close(self):
+        """
+        This function closes all pooled connections. It should be called once when the application shuts down.
+        Writes still queued for the writer thread are committed first.
+        """
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close()
+        return {"success": True, "message": "Database connections closed successfully", "data": []}
+
+    def _bump_version(self, cursor):
+        """
+        Increments the data version inside the current transaction, so it is committed together with the write.
+        Returns the new version, which the cache is told about once the write is committed (see `TaskCache.sync`).
+
+        :param cursor: The cursor of the connection that holds the transaction.
+        """
+        cursor.execute(sql("bump_version"))
+        cursor.execute(sql("select_version"))
+        return cursor.fetchone()[0]
+
+    def data_version(self):
+        """
+        This function returns the data version, a counter that changes whenever a task or team is written.
+        It is shared by every process using the database file.
+        """
+        conn, cursor = self.connect_db()
+        try:
+            cursor.execute(sql("select_version"))
+            row = cursor.fetchone()
+            response = {"success": True, "message": "Data version loaded successfully", "data": row[0] if row else 0}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading data version: {e}", "data": None}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def cache_stats(self):
+        """
+        This function returns the hit/miss statistics of the task cache used by `find_single_task`.
+        """
+        return {"success": True, "message": "Cache statistics", "data": self.cache.stats()}
+
     def create_task_table(self):
         """
         This function creates a task table.
         """
         conn, cursor = self.connect_db()
         try:
-            sql = '''CREATE TABLE IF NOT EXISTS task_manager (
+            ddl = '''CREATE TABLE IF NOT EXISTS task_manager (
                         task_id INTEGER PRIMARY KEY AUTOINCREMENT,
                         title TEXT NOT NULL,
                         due_date DATE NOT NULL,
@@ -51,7 +284,18 @@ class TaskManagerDB:
                         flag TEXT NOT NULL,
                         priority TEXT
                     )'''
-            cursor.execute(sql)
+            cursor.execute(ddl)
+            # Serves the pending and overdue queries
+            cursor.execute('''CREATE INDEX IF NOT EXISTS idx_task_status_due ON task_manager (status, due_date)''')
+            # Single row counter bumped by every write, used by the server to build ETags
+            cursor.execute('''CREATE TABLE IF NOT EXISTS db_version (
+                                id INTEGER PRIMARY KEY CHECK (id = 1),
+                                version INTEGER NOT NULL
+                            )''')
+            cursor.execute('''INSERT OR IGNORE INTO db_version (id, version) VALUES (1, 0)''')
+            self._create_change_log(cursor)
+            self._create_stats_tables(cursor)
+            self._create_search_index(cursor)
             conn.commit()
             response = {"success": True, "message": "Task table created successfully", "data": []}
         except sqlite3.Error as e:
@@ -60,20 +304,127 @@ class TaskManagerDB:
             self.disconnect_db(conn, cursor)
         return response
 
+    def _create_change_log(self, cursor):
+        """
+        Creates the `task_changes` log read by `fetch_task_changes` and the triggers that fill it (see `CHANGE_TRIGGERS`).
+
+        :param cursor: The cursor of the connection that is already open.
+        """
+        cursor.execute('''CREATE TABLE IF NOT EXISTS task_changes (
+                            version INTEGER NOT NULL,
+                            task_id INTEGER NOT NULL,
+                            PRIMARY KEY (version, task_id)
+                        ) WITHOUT ROWID''')
+        for trigger in CHANGE_TRIGGERS:
+            cursor.execute(trigger)
+
+    def _create_stats_tables(self, cursor):
+        """
+        Creates the counters read by `fetch_stats` and the triggers that maintain them (see `STATS_TRIGGERS`).
+        If the counters are new, the tasks already in the table are counted.
+
+        :param cursor: The cursor of the connection that is already open.
+        """
+        cursor.execute("""SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_stats'""")
+        exists = cursor.fetchone() is not None
+        cursor.execute('''CREATE TABLE IF NOT EXISTS task_stats (
+                            dimension TEXT NOT NULL,
+                            value TEXT NOT NULL,
+                            count INTEGER NOT NULL,
+                            PRIMARY KEY (dimension, value)
+                        ) WITHOUT ROWID''')
+        cursor.execute('''CREATE TABLE IF NOT EXISTS pending_due_counts (
+                            due_date TEXT PRIMARY KEY,
+                            count INTEGER NOT NULL
+                        ) WITHOUT ROWID''')
+        for trigger in STATS_TRIGGERS:
+            cursor.execute(trigger)
+        if not exists:
+            self._rebuild_stats(cursor)
+
+    def _rebuild_stats(self, cursor):
+        """
+        Recounts every task without committing. See `rebuild_stats`.
+        """
+        cursor.execute(sql("clear_stats"))
+        cursor.execute(sql("clear_pending_due_counts"))
+        for dimension in STATS_DIMENSIONS:
+            cursor.execute(count_stats_sql(dimension), (dimension,))
+        cursor.execute(sql("count_pending_due_dates"))
+
+    def rebuild_stats(self):
+        """
+        This function recounts the tasks behind `fetch_stats` from scratch. The triggers keep the counters
+        correct on their own, so this is only needed to repair them (e.g. after the triggers were dropped).
+        """
+        conn, cursor = self.connect_db()
+        try:
+            self._rebuild_stats(cursor)
+            conn.commit()
+            response = {"success": True, "message": "Task statistics rebuilt successfully", "data": []}
+        except sqlite3.Error as e:
+            conn.rollback()
+            response = {"success": False, "message": f"Error rebuilding task statistics: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def _create_search_index(self, cursor):
+        """
+        Creates the `task_fts` full-text index over the task titles and descriptions, and the triggers that
+        keep it in sync (see `SEARCH_TRIGGERS`). It is an external content table, so the text is not stored
+        twice. If the index is new, the tasks already in the table are indexed. Nothing is created if
+        SQLite was built without FTS5; `search_tasks` then reports an error.
+
+        :param cursor: The cursor of the connection that is already open.
+        """
+        cursor.execute("""SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'""")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS task_fts
+                              USING fts5(title, description, content='task_manager', content_rowid='task_id')''')
+        except sqlite3.OperationalError:
+            return  # No FTS5 support
+        for trigger in SEARCH_TRIGGERS:
+            cursor.execute(trigger)
+        if not exists:
+            cursor.execute(sql("set_search_rank"), (SEARCH_RANK,))
+            cursor.execute(sql("rebuild_search_index"))
+
+    def rebuild_search_index(self):
+        """
+        This function rebuilds the full-text index from the `task_manager` table, e.g. after tasks were
+        written while the triggers were missing. Run it with `python db.py rebuild-search`.
+        """
+        conn, cursor = self.connect_db()
+        try:
+            cursor.execute(sql("rebuild_search_index"))
+            cursor.execute(sql("optimize_search_index"))
+            conn.commit()
+            response = {"success": True, "message": "Search index rebuilt successfully", "data": []}
+        except sqlite3.Error as e:
+            conn.rollback()
+            response = {"success": False, "message": f"Error rebuilding search index: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
     def create_teams_table(self):
         """
         This function is intended to create a table for storing information about teams.
         """
         conn, cursor = self.connect_db()
         try:
-            sql = '''CREATE TABLE IF NOT EXISTS teams (
+            ddl = '''CREATE TABLE IF NOT EXISTS teams (
                         team_id INTEGER PRIMARY KEY AUTOINCREMENT,
                         task_id INTEGER,
                         first_name TEXT NOT NULL,
                         last_name TEXT NOT NULL,
                         FOREIGN KEY(task_id) REFERENCES task_manager(task_id)
                     )'''
-            cursor.execute(sql)
+            cursor.execute(ddl)
+            # Team members are always looked up by task
+            cursor.execute('''CREATE INDEX IF NOT EXISTS idx_teams_task_id ON teams (task_id)''')
             conn.commit()
             response = {"success": True, "message": "Teams table created successfully", "data": []}
         except sqlite3.Error as e:
@@ -82,6 +433,73 @@ class TaskManagerDB:
             self.disconnect_db(conn, cursor)
         return response
 
+    def migrate_db(self):
+        """
+        This function brings an existing database up to date. It creates the tables and indexes if they
+        are missing, converts due dates stored as `YYYY/MM/DD` to ISO and normalizes the statuses.
+        """
+        self.create_task_table()
+        self.create_teams_table()
+        conn, cursor = self.connect_db()
+        try:
+            cursor.execute(sql("select_slash_due_dates"))
+            dates = [(to_db_date(due_date), task_id) for task_id, due_date in cursor.fetchall()]
+            cursor.executemany(sql("update_due_date"), dates)
+            cursor.execute(sql("normalize_statuses"))
+            self._bump_version(cursor)
+            conn.commit()
+            self.cache.clear()
+            response = {"success": True, "message": f"Database migrated successfully ({len(dates)} due dates converted)", "data": []}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error migrating database: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def _write(self, error_message, operation, *args):
+        """
+        Runs a write operation and commits it. In write-behind mode the operation is handed to the writer
+        thread instead and this call returns once the batch it was committed with is written.
+
+        :param error_message: Prefix of the message returned when the operation fails.
+        :param operation: A method taking a cursor followed by `args` that writes without committing and
+        returns the response and the ID of the written task (None if nothing was written).
+        """
+        if self.writer is not None:
+            return self.writer.submit(error_message, operation, *args).result()
+
+        conn, cursor = self.connect_db()
+        try:
+            response, task_id = operation(cursor, *args)
+            if task_id is not None:
+                version = self._bump_version(cursor)
+            conn.commit()
+            if task_id is not None:
+                self.cache.invalidate(task_id, version)
+        except sqlite3.Error as e:
+            conn.rollback()
+            response = {"success": False, "message": f"{error_message}: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def _insert_task(self, cursor, task_data):
+        """
+        Writes a new task and its team without committing. See `save_to_db`.
+        """
+        cursor.execute(sql("insert_task"), (task_data['title'], to_db_date(task_data['due_date']),
+                                            normalize_status(task_data['status']), task_data['description'],
+                                            task_data['flag'], task_data['priority']))
+
+        task_id = cursor.lastrowid  # Get the ID of the newly inserted task
+
+        # If flag is "work", save team data
+        if task_data['flag'] == "work" and 'teams' in task_data:
+            for team_name in task_data['teams']:
+                cursor.execute(sql("insert_team_member"), (task_id, team_name.get("first_name"), team_name.get("last_name")))
+
+        return {"success": True, "message": "Data saved successfully", "data": dict(task_data, task_id=task_id)}, task_id
+
     def save_to_db(self, task_data):
         """
         This function saves task data to a database.
@@ -91,31 +509,91 @@ class TaskManagerDB:
         the database. This data include information such as task title, due date, status, description, 
         flag, team 
         """
+        # The task and its team are committed together
+        return self._write("Error saving data", self._insert_task, task_data)
+    
+    def _validate_bulk_task(self, task_data):
+        """
+        Checks a task of a bulk import and converts it to the rows that will be inserted.
+
+        :param task_data: The task as a dictionary.
+        :return: The task row and its list of `(first_name, last_name)` team rows, or an error message.
+        """
+        if not isinstance(task_data, dict):
+            return None, None, "Task must be a JSON object"
+        missing = [field for field in REQUIRED_TASK_FIELDS if not task_data.get(field)]
+        if missing:
+            return None, None, f"Missing required fields: {', '.join(missing)}"
+
+        team_rows = []
+        if task_data["flag"] == "work":
+            for member in task_data.get("teams") or []:
+                names = member_name(member)
+                if names is None or not all(names):
+                    return None, None, f"Invalid team member: {member}"
+                team_rows.append(names)
+
+        task_row = (task_data["title"], to_db_date(task_data["due_date"]),
+                    normalize_status(task_data.get("status", "pending")), task_data.get("description", ""),
+                    task_data["flag"], task_data.get("priority", "low"))
+        return task_row, team_rows, None
+
+    def save_many_to_db(self, tasks, batch_size=BULK_BATCH_SIZE):
+        """
+        Saves many tasks at once. Tasks and team members are inserted with `executemany` in batches of
+        `batch_size`, all inside a single transaction that is committed once at the end.
+
+        Invalid tasks are skipped and reported with their position in `tasks`. If the database raises an
+        error the whole import is rolled back and nothing is saved.
+
+        :param tasks: A list of task dictionaries, in the same format as for `save_to_db`.
+        :param batch_size: The number of tasks inserted per `executemany` call.
+        :return: A dictionary whose data holds the IDs of the saved tasks and the per-task errors.
+        """
+        errors = []
+        valid = []
+        for index, task_data in enumerate(tasks):
+            task_row, team_rows, error = self._validate_bulk_task(task_data)
+            if error:
+                errors.append({"index": index, "message": error})
+            else:
+                valid.append((task_row, team_rows))
+
         conn, cursor = self.connect_db()
         try:
-            # Save task data
-            sql_task = '''INSERT INTO task_manager (title, due_date, status, description, flag, priority)
-                          VALUES (?, ?, ?, ?, ?, ?)'''
-            cursor.execute(sql_task, (task_data['title'], task_data['due_date'], task_data['status'],
-                                      task_data['description'], task_data['flag'], task_data['priority']))
-            conn.commit()
-            
-            task_id = cursor.lastrowid  # Get the ID of the newly inserted task
+            task_ids = []
+            for start in range(0, len(valid), batch_size):
+                batch = valid[start:start + batch_size]
+                cursor.executemany(sql("insert_task"), [task_row for task_row, _ in batch])
 
-            # If flag is "work", save team data
-            if task_data['flag'] == "work" and 'teams' in task_data:
-                sql_team = '''INSERT INTO teams (task_id, first_name, last_name) VALUES (?, ?, ?)'''
-                for team_name in task_data['teams']:
-                    cursor.execute(sql_team, (task_id, team_name.get("first_name"), team_name.get("last_name")))
-                conn.commit()
+                # The transaction holds the write lock, so the AUTOINCREMENT IDs of the batch are consecutive
+                # and end at the current sequence value
+                cursor.execute(sql("select_last_task_id"))
+                last_id = cursor.fetchone()[0]
+                batch_ids = range(last_id - len(batch) + 1, last_id + 1)
+                task_ids.extend(batch_ids)
 
-            response = {"success": True, "message": "Data saved successfully", "data": task_data}
+                team_rows = [(task_id, first_name, last_name)
+                             for task_id, (_, members) in zip(batch_ids, batch)
+                             for first_name, last_name in members]
+                if team_rows:
+                    cursor.executemany(sql("insert_team_member"), team_rows)
+            version = self._bump_version(cursor)
+            conn.commit()
+            self.cache.committed(version)  # Only new tasks, so no cached task changed
+
+            message = f"{len(task_ids)} tasks saved successfully"
+            if errors:
+                message += f", {len(errors)} rejected"
+            response = {"success": True, "message": message, "data": {"task_ids": task_ids, "errors": errors}}
         except sqlite3.Error as e:
-            response = {"success": False, "message": f"Error saving data: {e}", "data": []}
+            conn.rollback()
+            response = {"success": False, "message": f"Error saving data, no tasks were saved: {e}",
+                        "data": {"task_ids": [], "errors": errors}}
         finally:
             self.disconnect_db(conn, cursor)
         return response
-    
+
     def fetch_members(self, task_id):
         """
         Fetches members associated with a specific task ID from the database.
@@ -124,9 +602,8 @@ class TaskManagerDB:
         """
         conn, cursor = self.connect_db()
         try:
-            sql_teams = '''SELECT * FROM teams WHERE task_id = ?'''
-            cursor.execute(sql_teams, (task_id,))
-            data = [(row[0], row[1], row[2], row[3]) for row in cursor.fetchall()]
+            cursor.execute(sql("select_team"), (task_id,))
+            data = [TeamMember._make(row) for row in cursor.fetchall()]
             if len(data) == 0:
                 response = {"success": True, "message": f"No Members found", "data": []}
             else:
@@ -138,83 +615,413 @@ class TaskManagerDB:
             self.disconnect_db(conn, cursor)
         return response
         
-    def load_from_db(self):
+    def fetch_teams(self, task_ids):
         """
-        This function is used to load data from a database.
+        Fetches the team members of several tasks with one batched query. The data maps each task ID to
+        its list of `TeamMember` rows; tasks without members are left out.
+
+        :param task_ids: The IDs of the tasks.
         """
         conn, cursor = self.connect_db()
         try:
-            # Fetch tasks
-            sql_tasks = '''SELECT * FROM task_manager'''
-            cursor.execute(sql_tasks)
-            tasks = cursor.fetchall()
+            response = {"success": True, "message": "Team members loaded successfully",
+                        "data": self._fetch_teams(cursor, task_ids)}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading team members: {e}", "data": {}}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def _fetch_teams(self, cursor, task_ids):
+        """
+        Fetches the team members of several tasks at once and groups them by task.
 
-            # Enrich tasks with teams if the flag is "work"
-            enriched_tasks = []
-            for task in tasks:
-                task_id, title, due_date, status, description, flag, priority = task
-                task_dict = {
-                    "task_id": task_id,
-                    "title": title,
-                    "due_date": due_date,
-                    "status": status,
-                    "description": description,
-                    "flag": flag,
-                    "priority": priority,
-                    "teams": []
-                }
-
-                if flag == "work":
-                    teams = self.fetch_members(task_id)
-                    task_dict["teams"] = teams["data"]
-
-                enriched_tasks.append(task_dict)
-
-            response = {"success": True, "message": "Data loaded successfully", "data": enriched_tasks}
+        :param cursor: The cursor of the connection that is already open.
+        :param task_ids: The IDs of the tasks whose members are needed. They are queried in batches of
+        `TEAM_BATCH_SIZE` so the statement stays below SQLite's limit of bound parameters. The batches are
+        padded to a few sizes (see `in_list`), so they reuse the same prepared statements.
+        :return: A dictionary mapping each task ID to its list of `TeamMember` rows.
+        """
+        teams = {}
+        task_ids = list(task_ids)
+        for start in range(0, len(task_ids), TEAM_BATCH_SIZE):
+            _, params = in_list(task_ids[start:start + TEAM_BATCH_SIZE], TEAM_BATCH_SIZE)
+            cursor.execute(select_teams_in_sql(len(params)), params)
+            for row in cursor.fetchall():
+                teams.setdefault(row[1], []).append(TeamMember._make(row))
+        return teams
+
+    def _build_filters(self, flag=None, status=None, priority=None, after_id=None):
+        """
+        Builds the `WHERE` clause shared by the task listing queries.
+
+        :param flag: Only keep tasks with this flag.
+        :param status: Only keep tasks with this status.
+        :param priority: Only keep tasks with this priority.
+        :param after_id: Only keep tasks with a larger `task_id` (the keyset cursor of the previous page).
+        :return: The clause (empty if there are no filters) and its parameters.
+        """
+        conditions, params = [], []
+        if after_id is not None:
+            conditions.append("task_id > ?")
+            params.append(after_id)
+        if flag is not None:
+            conditions.append("flag = ?")
+            params.append(flag)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(normalize_status(status))
+        if priority is not None:
+            conditions.append("priority = ?")
+            params.append(priority)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, params
+
+    def _query_projected_tasks(self, cursor, fields, where="", params=()):
+        """
+        Runs a task query that only reads the requested fields. Team members are only fetched if `teams` is requested.
+
+        :param cursor: The cursor of the connection that is already open.
+        :param fields: The fields to return, a subset of `TASK_FIELDS`.
+        :param where: An optional SQL condition (including the `WHERE` keyword) to filter the tasks with.
+        :param params: The parameters bound into the condition.
+        :return: A list of `TaskRecord`s holding only `task_id` and the requested fields.
+        """
+        with_teams = "teams" in fields
+        columns = ["task_id"] + [field for field in fields if field not in ("task_id", "teams")]
+        flag_index = None
+        if with_teams:
+            # The flag decides whether a task has a team, so read it even if it is not returned
+            if "flag" not in columns:
+                columns.append("flag")
+            flag_index = columns.index("flag")
+
+        cursor.execute(select_tasks_sql(", ".join(columns), where), params)
+        rows = cursor.fetchall()
+
+        teams = {}
+        if with_teams:
+            teams = self._fetch_teams(cursor, [row[0] for row in rows if row[flag_index] == "work"])
+
+        # The columns that are returned, leaving out a flag that was only read to find the work tasks
+        returned = [(index, name) for index, name in enumerate(columns) if name == "task_id" or name in fields]
+        tasks = []
+        for row in rows:
+            record = TaskRecord.from_fields((name, row[index]) for index, name in returned)
+            if with_teams:
+                record.teams = teams.get(row[0], NO_TEAM) if row[flag_index] == "work" else NO_TEAM
+            if "due_date" in fields:
+                record.due_date = from_db_date(record.due_date)
+            tasks.append(record)
+        return tasks
+
+    def _query_tasks(self, cursor, where="", params=(), fields=None):
+        """
+        Runs a task query and enriches the work tasks with their team members.
+
+        :param cursor: The cursor of the connection that is already open.
+        :param where: An optional SQL condition (including the `WHERE` keyword) to filter the tasks with.
+        :param params: The parameters bound into the condition.
+        :param fields: An optional subset of `TASK_FIELDS` to read. All fields are read by default.
+        Every field but `teams` is read like all fields, only without the team members.
+        :return: A list of `TaskRecord`s.
+        """
+        with_teams = fields is None or "teams" in fields
+        if fields is not None and (with_teams or not COLUMN_FIELDS <= {"task_id", *fields}):
+            return self._query_projected_tasks(cursor, fields, where, params)
+
+        # Fetch tasks
+        cursor.execute(select_tasks_sql(TASK_COLUMNS, where), params)
+        tasks = cursor.fetchall()
+
+        # Fetch the teams of all work tasks in one go
+        teams = {}
+        if with_teams:
+            teams = self._fetch_teams(cursor, [task[0] for task in tasks if task[5] == "work"])
+
+        # Statuses, flags, priorities and due dates repeat across rows, so keep a single copy of each value
+        share = {}.setdefault
+
+        # Enrich tasks with teams if the flag is "work"
+        records = []
+        for task_id, title, due_date, status, description, flag, priority in tasks:
+            due_date = from_db_date(due_date)
+            record = TaskRecord(task_id, title, share(due_date, due_date), share(status, status), description,
+                                share(flag, flag), share(priority, priority),
+                                teams.get(task_id, NO_TEAM) if flag == "work" else NO_TEAM)
+            if not with_teams:
+                del record.teams
+            records.append(record)
+        return records
+
+    def _query_tasks_by_id(self, cursor, task_ids, fields=None):
+        """
+        Reads the given tasks, in the order of `task_ids`. Missing tasks are left out.
+
+        :param cursor: The cursor of the connection that is already open.
+        :param task_ids: The IDs of the tasks. They are queried in batches of `TEAM_BATCH_SIZE`.
+        :param fields: An optional subset of `TASK_FIELDS` to read.
+        """
+        task_ids = list(task_ids)
+        found = {}
+        for start in range(0, len(task_ids), TEAM_BATCH_SIZE):
+            placeholders, params = in_list(task_ids[start:start + TEAM_BATCH_SIZE], TEAM_BATCH_SIZE)
+            for task in self._query_tasks(cursor, f"WHERE task_id IN ({placeholders})", params, fields):
+                found[task["task_id"]] = task
+        return [found[task_id] for task_id in task_ids if task_id in found]
+
+    def fetch_tasks_by_id(self, task_ids, fields=None):
+        """
+        Fetches several tasks by their IDs, returned in the same order as `task_ids`.
+
+        :param task_ids: The IDs of the tasks to fetch.
+        :param fields: An optional subset of `TASK_FIELDS` to read.
+        """
+        conn, cursor = self.connect_db()
+        try:
+            tasks = self._query_tasks_by_id(cursor, task_ids, fields)
+            response = {"success": True, "message": "Tasks loaded successfully", "data": tasks}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading tasks: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def load_from_db(self, limit=None, after_id=None, fields=None, flag=None, status=None, priority=None):
+        """
+        This function is used to load data from a database. Tasks are read with one query and the team
+        members of all work tasks with one batched query, instead of one extra query per work task.
+
+        :param limit: The maximum number of tasks to return. All tasks are returned by default.
+        :param after_id: Keyset cursor, only tasks with a larger `task_id` are returned. Tasks are ordered by `task_id`.
+        :param fields: An optional subset of `TASK_FIELDS` to read. Team members are only fetched if `teams` is included.
+        :param flag: Only return tasks with this flag.
+        :param status: Only return tasks with this status.
+        :param priority: Only return tasks with this priority.
+        """
+        if fields is not None and not set(fields) <= set(TASK_FIELDS):
+            return {"success": False, "message": f"Unknown fields requested. Allowed fields are: {', '.join(TASK_FIELDS)}", "data": []}
+
+        where, params = self._build_filters(flag, status, priority, after_id)
+        where += " ORDER BY task_id"
+        if limit is not None:
+            where += " LIMIT ?"
+            params.append(limit)
+
+        conn, cursor = self.connect_db()
+        try:
+            tasks = self._query_tasks(cursor, where, params, fields)
+            response = {"success": True, "message": "Data loaded successfully", "data": tasks}
         except sqlite3.Error as e:
             response = {"success": False, "message": f"Error loading data: {e}", "data": []}
         finally:
             self.disconnect_db(conn, cursor)
         return response
+
+    def iter_tasks(self, chunk_size=500, fields=None, flag=None, status=None, priority=None):
+        """
+        Generator that yields the tasks (with their teams) one by one, reading them in chunks of `chunk_size`.
+        Only one chunk is held in memory at a time. Each chunk is read with its own keyset query on a
+        connection that is handed back before the chunk is yielded, so a slow consumer neither pins a
+        pooled connection nor holds a read lock on the database.
+
+        :param chunk_size: The number of tasks read per query.
+        :param fields: An optional subset of `TASK_FIELDS` to read.
+        :param flag: Only yield tasks with this flag.
+        :param status: Only yield tasks with this status.
+        :param priority: Only yield tasks with this priority.
+        """
+        if fields is not None and not set(fields) <= set(TASK_FIELDS):
+            raise ValueError(f"Unknown fields requested. Allowed fields are: {', '.join(TASK_FIELDS)}")
+
+        after_id = None
+        while True:
+            where, params = self._build_filters(flag, status, priority, after_id)
+            conn, cursor = self.connect_db()
+            try:
+                chunk = self._query_tasks(cursor, where + " ORDER BY task_id LIMIT ?", params + [chunk_size], fields)
+            finally:
+                self.disconnect_db(conn, cursor)
+
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+            after_id = chunk[-1]["task_id"]
+
+    def fetch_pending_tasks(self):
+        """
+        Fetches the pending tasks. The filtering is done by SQL on the `(status, due_date)` index,
+        so only the returned rows are read.
+        """
+        conn, cursor = self.connect_db()
+        try:
+            tasks = self._query_tasks(cursor, "WHERE status = ? ORDER BY due_date", ("pending",))
+            response = {"success": True, "message": "Pending tasks loaded successfully", "data": tasks}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading pending tasks: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def fetch_overdue_tasks(self, today=None):
+        """
+        Fetches the pending tasks whose due date has passed. The comparison is done by SQL on the
+        ISO due dates, which sort the same way as the dates themselves.
+
+        :param today: The date to compare against. Defaults to the current date.
+        """
+        today = today or datetime.now().date()
+        conn, cursor = self.connect_db()
+        try:
+            tasks = self._query_tasks(cursor, "WHERE status = ? AND due_date < ? ORDER BY due_date",
+                                      ("pending", today.strftime(DB_DATE_FORMAT)))
+            response = {"success": True, "message": "Overdue tasks loaded successfully", "data": tasks}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading overdue tasks: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
     
+    def fetch_task_changes(self, since, until):
+        """
+        Fetches the tasks whose due date or status was written after data version `since`, up to and including
+        version `until`, as `(task_id, due_date, status)` rows. Deleted tasks have a due date and status of None.
+        The log only covers the last `CHANGE_LOG_VERSIONS` versions; for an older `since` an error is returned.
+
+        :param since: The data version the caller is up to date with.
+        :param until: The current data version, as returned by `data_version`.
+        """
+        if until - since > CHANGE_LOG_VERSIONS:
+            return {"success": False, "message": f"The change log does not go back to version {since}", "data": []}
+        conn, cursor = self.connect_db()
+        try:
+            cursor.execute(sql("select_task_changes"), (since, until))
+            response = {"success": True, "message": "Task changes loaded successfully", "data": cursor.fetchall()}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading task changes: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def search_tasks(self, query, limit=20, offset=0, fields=None):
+        """
+        Searches the titles and descriptions of the tasks. Every word of the query has to appear in the
+        title or the description; the results are ranked with bm25, matches in the title counting most.
+
+        :param query: The words to search for. They are matched as plain words, FTS5 operators are not interpreted.
+        :param limit: The maximum number of tasks to return.
+        :param offset: The number of best matches to skip, for the following pages.
+        :param fields: An optional subset of `TASK_FIELDS` to read.
+        """
+        # Quote every word so characters like `-`, `*` or `"` are searched for instead of parsed as syntax
+        words = ['"' + word.replace('"', '""') + '"' for word in query.split()]
+        if not words:
+            return {"success": True, "message": "No search terms given", "data": []}
+
+        conn, cursor = self.connect_db()
+        try:
+            cursor.execute(sql("search_task_ids"), (" ".join(words), limit, offset))
+            tasks = self._query_tasks_by_id(cursor, [row[0] for row in cursor.fetchall()], fields)
+            response = {"success": True, "message": "Search completed successfully", "data": tasks}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error searching tasks: {e}", "data": []}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def fetch_stats(self, today=None):
+        """
+        Fetches the number of tasks per status, flag and priority, and the number of overdue tasks. The
+        counts are read from the counters maintained by triggers, so `task_manager` itself is not scanned.
+
+        :param today: The date the overdue tasks are counted against. Defaults to the current date.
+        """
+        today = today or datetime.now().date()
+        conn, cursor = self.connect_db()
+        try:
+            stats = {"total": 0, "status": {}, "flag": {}, "priority": {}}
+            cursor.execute(sql("select_stats"))
+            for dimension, value, count in cursor.fetchall():
+                stats[dimension][value] = count
+            stats["total"] = sum(stats["flag"].values())
+            cursor.execute(sql("count_overdue"), (today.strftime(DB_DATE_FORMAT),))
+            stats["overdue"] = cursor.fetchone()[0]
+            response = {"success": True, "message": "Task statistics loaded successfully", "data": stats}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading task statistics: {e}", "data": {}}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
+    def fetch_analytics_rows(self):
+        """
+        Fetches `(task_id, due_date, status, priority)` of every task and `(task_id, name)` of every team
+        member as plain rows, for the column arrays of analytics.py. No task records are built.
+        """
+        conn, cursor = self.connect_db()
+        try:
+            cursor.execute(sql("select_analytics_columns"))
+            tasks = cursor.fetchall()
+            cursor.execute(sql("select_member_names"))
+            members = cursor.fetchall()
+            response = {"success": True, "message": "Analytics data loaded successfully",
+                        "data": {"tasks": tasks, "members": members}}
+        except sqlite3.Error as e:
+            response = {"success": False, "message": f"Error loading analytics data: {e}", "data": {}}
+        finally:
+            self.disconnect_db(conn, cursor)
+        return response
+
     def find_single_task(self, task_id):
         """
         This function is used to find a single task based on its task_id.
 
         :param task_id: The `find_single_task` method is used to search for a specific task based on its
         `task_id`. The `task_id` parameter is the unique identifier of the task that you want to find.
+        Found tasks are kept in an LRU cache until they expire or are written to, by this process or another one.
         """
+        if self.cache.needs_sync():
+            # At most every `check_interval` seconds: a version this process did not commit drops the cached tasks
+            version = self.data_version()
+            if version["success"]:
+                self.cache.sync(version["data"])
+        cached = self.cache.get(task_id)
+        if cached is not None:
+            return {"success": True, "message": "Task found", "data": cached}
+        version = self.cache.version()
+
         conn, cursor = self.connect_db()
-        response = {}
         try:
-            sql = '''SELECT * FROM task_manager WHERE task_id = ?'''
-            cursor.execute(sql, (task_id,))
-            row = cursor.fetchone()
-            if row:
-                # Convert row to a dictionary 
-                task_data = {
-                    "task_id": row[0],
-                    "title": row[1],
-                    "due_date": row[2],
-                    "status": row[3],
-                    "description": row[4],
-                    "flag": row[5],
-                    "priority": row[6],
-                }
-                if row[5] == "work":
-                    members = self.fetch_members(task_id)
-                    task_data["teams"] = members["data"] if members["data"] else []
-
+            task_data = self._read_task(cursor, task_id)
+            if task_data:
+                self.cache.put(task_id, task_data, version)
                 response = {"success": True, "message": "Task found", "data": task_data}
-                return response
             else:
                 response = {"success": False, "message": "Task not found", "data": []}
-                return response
         except sqlite3.Error as e:
             response = {"success": False, "message": f"Error finding task: {e}", "data": []}
-            return response
         finally:
             self.disconnect_db(conn, cursor)
+        return response
+
+    def _read_task(self, cursor, task_id):
+        """
+        Reads a task and its team, bypassing the cache. Returns the `TaskRecord`, or None if there is no such task.
+
+        :param cursor: The cursor to read with.
+        :param task_id: The ID of the task to read.
+        """
+        cursor.execute(sql("select_task"), (task_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        task_id, title, due_date, status, description, flag, priority = row
+        if flag == "work":
+            teams = self._fetch_teams(cursor, [task_id]).get(task_id, [])
+            return TaskRecord(task_id, title, from_db_date(due_date), status, description, flag, priority, teams)
+        # Personal tasks are returned without a `teams` field
+        return TaskRecord.from_fields(zip(TASK_COLUMNS.split(", "), (task_id, title, from_db_date(due_date), status,
+                                                                    description, flag, priority)))
 
     def insert_team_member(self, task_id, first_name, last_name):
         """
@@ -226,9 +1033,10 @@ class TaskManagerDB:
         """
         conn, cursor = self.connect_db()
         try:
-            sql_insert_team = '''INSERT INTO teams (task_id, first_name, last_name) VALUES (?, ?, ?)'''
-            cursor.execute(sql_insert_team, (task_id, first_name, last_name))
+            cursor.execute(sql("insert_team_member"), (task_id, first_name, last_name))
+            version = self._bump_version(cursor)
             conn.commit()
+            self.cache.invalidate(task_id, version)
             return {"success": True, "message": "Team member added successfully"}
         except sqlite3.Error as e:
             return {"success": False, "message": f"Error inserting team member: {e}"}
@@ -247,9 +1055,10 @@ class TaskManagerDB:
         """
         conn, cursor = self.connect_db()
         try:
-            sql_update_team = '''UPDATE teams SET first_name = ?, last_name = ? WHERE team_id = ? AND task_id = ?'''
-            cursor.execute(sql_update_team, (first_name, last_name, team_id, task_id))
+            cursor.execute(sql("update_team_member"), (first_name, last_name, team_id, task_id))
+            version = self._bump_version(cursor)
             conn.commit()
+            self.cache.invalidate(task_id, version)
             return {"success": True, "message": "Team member updated successfully"}
         except sqlite3.Error as e:
             return {"success": False, "message": f"Error updating team member: {e}"}
@@ -266,136 +1075,125 @@ class TaskManagerDB:
         """
         conn, cursor = self.connect_db()
         try:
-            sql_delete_team = '''DELETE FROM teams WHERE team_id = ? AND task_id = ?'''
-            cursor.execute(sql_delete_team, (team_id, task_id))
+            cursor.execute(sql("delete_team_member"), (team_id, task_id))
+            version = self._bump_version(cursor)
             conn.commit()
+            self.cache.invalidate(task_id, version)
             return {"success": True, "message": "Team member deleted successfully"}
         except sqlite3.Error as e:
             return {"success": False, "message": f"Error deleting team member: {e}"}
         finally:
             self.disconnect_db(conn, cursor)
 
+    def _reconcile_team(self, cursor, task_id, new_teams):
+        """
+        Brings the team of a task in line with `new_teams` without committing. The existing and the new
+        members are diffed on `(first_name, last_name)`: members present in both are left alone, removed
+        members are renamed to added ones (keeping their `team_id`), and whatever is left is inserted or
+        deleted. Each kind of change is applied with a single batched statement.
+
+        :param cursor: The cursor of the connection that holds the transaction.
+        :param task_id: The ID of the task whose team is updated.
+        :param new_teams: The new team members, as dictionaries or `(..., first_name, last_name)` tuples.
+        """
+        cursor.execute(sql("select_team_names"), (task_id,))
+        existing = {}
+        for team_id, first_name, last_name in cursor.fetchall():
+            existing.setdefault((first_name, last_name), []).append(team_id)
+
+        added = []
+        for member in new_teams:
+            names = member_name(member)
+            if names is None:
+                continue  # Skip invalid entries
+            team_ids = existing.get(names)
+            if team_ids:
+                team_ids.pop(0)  # Unchanged member
+            else:
+                added.append(names)
+        removed = sorted(team_id for team_ids in existing.values() for team_id in team_ids)
+
+        renamed = list(zip(added, removed))
+        if renamed:
+            cursor.executemany(sql("update_team_member"),
+                               [(first_name, last_name, team_id, task_id) for (first_name, last_name), team_id in renamed])
+        if len(added) > len(renamed):
+            cursor.executemany(sql("insert_team_member"),
+                               [(task_id, first_name, last_name) for first_name, last_name in added[len(renamed):]])
+        if len(removed) > len(renamed):
+            cursor.executemany(sql("delete_team_member"),
+                               [(team_id, task_id) for team_id in removed[len(renamed):]])
+
+    def _update_task(self, cursor, task_id, task_update):
+        """
+        Writes the changes to a task and its team without committing. See `update_in_db`.
+        """
+        # Update the task details
+        cursor.execute(sql("update_task"), (task_update['title'], to_db_date(task_update['due_date']),
+                                            normalize_status(task_update['status']), task_update['description'],
+                                            task_update['flag'], task_update['priority'], task_id))
+        if cursor.rowcount == 0:
+            return {"success": False, "message": "Task with the specified ID does not exist", "data": []}, None
+
+        # Handle team updates if the task is flagged as "work"
+        if task_update.get('flag') == "work":
+            if 'teams' not in task_update:
+                # If no teams provided, delete all existing team members for the task
+                cursor.execute(sql("delete_team"), (task_id,))
+            else:
+                self._reconcile_team(cursor, task_id, task_update["teams"] or [])
+
+        # Read the task back on the same connection, so the response shows the update before it is committed
+        updated_task = self._read_task(cursor, task_id)
+        return {"success": True, "message": "Task and teams updated successfully", "data": updated_task}, task_id
+
     def update_in_db(self, task_id, task_update):
         """
-        Updates a task and its associated team members in the database.
+        Updates a task and its associated team members in the database. The task and all team changes
+        are written on one connection and committed together, so the update is atomic.
 
         :param task_id: The unique identifier of the task to update.
         :param task_update: A dictionary containing the updated task and team information.
         """
-        task = self.find_single_task(task_id)
-        if not task["success"]:
-            return {"success": False, "message": "Task with the specified ID does not exist", "data": []}
+        return self._write("Error updating task", self._update_task, task_id, task_update)
 
-        conn, cursor = self.connect_db()
-        try:
-            # Update the task details
-            sql_task = '''UPDATE task_manager 
-                        SET title = ?, due_date = ?, status = ?, description = ?, flag = ?, priority = ?
-                        WHERE task_id = ?'''
-            cursor.execute(sql_task, (task_update['title'], task_update['due_date'], task_update['status'],
-                                    task_update['description'], task_update['flag'], task_update['priority'], task_id))
-            conn.commit()
+    def _delete_task(self, cursor, task_id):
+        """
+        Deletes a task and its team without committing. See `delete_from_db`.
+        """
+        # Delete associated teams first. This is done whatever the flag, so members left over
+        # from when the task was a work task are removed as well
+        cursor.execute(sql("delete_team"), (task_id,))
 
-            # Handle team updates if the task is flagged as "work"
-            if task_update.get('flag') == "work":
-                # Check if 'teams' key exists in the task_update
-                if 'teams' not in task_update:
-                    # If no teams provided, delete all existing team members for the task
-                    teams_members = self.fetch_members(task_id)["data"]
-                    if teams_members is not None:
-                        for team_id, task_id, first_name, last_name in teams_members:
-                            self.delete_team_member(team_id, task_id)
-                else:
-                    # Process team updates
-                    # Fetch existing team members
-                    team = self.fetch_members(task_id)["data"]
-                    existing_teams = [(row[0], row[1], row[2], row[3]) for row in team] if team else []
-
-                    # Prepare updated team data
-                    new_teams = task_update["teams"]
-
-                    # Update or add new members
-                    updated_team_ids = []
-                    for new_team in new_teams:
-                        if isinstance(new_team, tuple):
-                            # Unpack the tuple if new_team is a tuple
-                            first_name, last_name = new_team[-2:]
-                        elif isinstance(new_team, dict):
-                            # Safely access if new_team is a dictionary
-                            first_name, last_name = new_team.get("first_name"), new_team.get("last_name")
-                        else:
-                            continue  # Skip invalid entries
-
-                        found = False
-                        for team_id, task_id, existing_first, existing_last in existing_teams:
-                            name_change = first_name == existing_first and last_name == existing_last
-                            if name_change:
-                                updated_team_ids.append(team_id)
-                                found = True
-                                break
-                            elif team_id not in updated_team_ids:
-                                # Update existing member
-                                self.update_team_member(team_id, task_id, first_name, last_name)
-                                updated_team_ids.append(team_id)
-                                found = True
-                                break
-
-                        if not found:
-                            # Insert new member
-                            self.insert_team_member(task_id, first_name, last_name)
-
-                    # Delete members not in the updated list
-                    for team_id, task_id, first_name, last_name in existing_teams:
-                        if team_id not in updated_team_ids:
-                            self.delete_team_member(team_id, task_id)
-
-            updated_task = self.find_single_task(task_id)
-            response = {"success": True, "message": "Task and teams updated successfully", "data": updated_task["data"]}
-        except sqlite3.Error as e:
-            response = {"success": False, "message": f"Error updating task: {e}", "data": []}
-        finally:
-            self.disconnect_db(conn, cursor)
-        return response
+        # Delete the task
+        cursor.execute(sql("delete_task"), (task_id,))
+        if cursor.rowcount == 0:
+            return {"success": False, "message": "Task with the specified ID does not exist", "data": []}, None
+        return {"success": True, "message": "Task and associated teams deleted successfully", "data": []}, task_id
 
     def delete_from_db(self, task_id):
         """
-        Deletes a task from the database. If the task's flag is 'work', it deletes the associated teams first to avoid foreign key violations.
+        Deletes a task from the database. It deletes the associated teams first to avoid foreign key violations.
         
         :param task_id: The ID of the task to delete.
         :return: A dictionary containing the status of the deletion.
         """
-        task = self.find_single_task(task_id)
-        if not task["success"]:
-            return {"success": False, "message": "Task with the specified ID does not exist", "data": []}
-        else: 
-            conn, cursor = self.connect_db()
-            try:
-                # Check if the flag is 'work'
-                flag = task.get("flag") 
-                if flag == "work":
-                    # Delete associated teams first
-                    sql_teams = '''DELETE FROM teams WHERE task_id = ?'''
-                    cursor.execute(sql_teams, (task_id,))
-                
-                # Delete the task
-                sql_task = '''DELETE FROM task_manager WHERE task_id = ?'''
-                cursor.execute(sql_task, (task_id,))
-                conn.commit()
-                response = {"success": True, "message": "Task and associated teams deleted successfully", "data": []}
-                return response
-            except sqlite3.Error as e:
-                response = {"success": False, "message": f"Error deleting task: {e}", "data": []}
-                return response
-            finally:
-                self.disconnect_db(conn, cursor)
+        return self._write("Error deleting task", self._delete_task, task_id)
 
 if __name__ == "__main__":
+    import sys
+
     # Example usage
     db = TaskManagerDB()
 
     # Creating tables
     print(db.create_task_table())
     print(db.create_teams_table())
+    print(db.migrate_db())
+
+    # `python db.py rebuild-search` rebuilds the full-text index of an existing database
+    if sys.argv[1:] == ["rebuild-search"]:
+        print(db.rebuild_search_index())
 
     # # Saving a work task with teams
     # work_task_data = {
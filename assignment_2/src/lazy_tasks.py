@@ -0,0 +1,115 @@
+from bisect import bisect_left
+from collections.abc import Sequence
+from records import NO_TEAM
+from task import PersonalTask, WorkTask
+
+# Number of records whose team members are read together, the first time a work task among them is built
+TEAM_BLOCK_SIZE = 500
+
+
+def task_from_record(record):
+    """
+    Builds the `WorkTask` or `PersonalTask` of a task record. The team member names come from the
+    record's `teams`, so no query is made.
+
+    :param record: A `TaskRecord` with all fields (the `teams` of a work task must be set).
+    """
+    if record.flag == "work":
+        task = WorkTask(record.title, record.due_date)
+        task.team_members = [f"{member.first_name} {member.last_name}" for member in record.teams]
+    else:
+        task = PersonalTask(record.title, record.due_date)
+        if record.priority:
+            task.priority = record.priority
+    task.set_task_id(record.task_id)
+    task.status = record.status
+    # Stored descriptions are kept as they are; the length check of `set_description` is for new input
+    task._description = record.description
+    return task
+
+
+# This class represents the tasks loaded by `TaskManager.load_task`. It wraps the `TaskRecord`s read by the
+# database layer (ordered by task ID, without their team members) and only builds the `Task` of a record when
+# that task is accessed; the task is then kept, so later accesses return the same object. The team members
+# are read when the first work task of a block of `TEAM_BLOCK_SIZE` records is built, with one query for the
+# block. Reading fields through `values()` or `records` does not build any task, so it costs about as much as
+# iterating the rows themselves.
+class LazyTaskCollection(Sequence):
+    __slots__ = ("records", "_tasks", "_db", "_team_blocks")
+
+    def __init__(self, records, db=None):
+        """
+        :param records: The task records, ordered by `task_id`. Records without `teams` have their team
+        members read from `db` when they are needed.
+        :param db: The `TaskManagerDB` the team members are read from.
+        """
+        self.records = records
+        self._tasks = [None] * len(records)
+        self._db = db
+        self._team_blocks = set()  # Blocks whose team members have been read
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        task = self._tasks[index]
+        if task is None:
+            record = self.records[index]
+            if record.flag == "work" and "teams" not in record:
+                self._load_teams(index % len(self.records) // TEAM_BLOCK_SIZE)
+            task = self._tasks[index] = task_from_record(record)
+        return task
+
+    def __iter__(self):
+        for index in range(len(self.records)):
+            yield self[index]
+
+    def _load_teams(self, block):
+        """
+        Reads the team members of the work tasks in a block of records with one query and sets their `teams`.
+
+        :param block: The number of the block, the index of its first record divided by `TEAM_BLOCK_SIZE`.
+        """
+        if block in self._team_blocks:
+            return
+        records = [record for record in self.records[block * TEAM_BLOCK_SIZE:(block + 1) * TEAM_BLOCK_SIZE]
+                   if record.flag == "work" and "teams" not in record]
+        teams = self._db.fetch_teams([record.task_id for record in records])["data"] if records else {}
+        for record in records:
+            record.teams = teams.get(record.task_id, NO_TEAM)
+        self._team_blocks.add(block)
+
+    def values(self, field):
+        """
+        Yields one field of every task, read from the records without building the tasks. For `teams` the
+        team members are read first, block by block.
+
+        :param field: A task field, e.g. `status` or `due_date`.
+        """
+        if field == "teams":
+            for block in range((len(self.records) + TEAM_BLOCK_SIZE - 1) // TEAM_BLOCK_SIZE):
+                self._load_teams(block)
+            for record in self.records:
+                yield record.teams if record.flag == "work" else NO_TEAM
+            return
+        for record in self.records:
+            yield getattr(record, field)
+
+    def get(self, task_id):
+        """
+        Returns the task with the given ID, found with a binary search, or None if it was not loaded.
+
+        :param task_id: The ID of the task.
+        """
+        index = bisect_left(self.records, task_id, key=lambda record: record.task_id)
+        if index < len(self.records) and self.records[index].task_id == task_id:
+            return self[index]
+        return None
+
+    def hydrated(self):
+        """
+        Returns the number of tasks that have been built so far.
+        """
+        return len(self._tasks) - self._tasks.count(None)
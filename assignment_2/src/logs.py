@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Level of the messages that are logged, unless TASK_LOG_LEVEL says otherwise
+DEFAULT_LOG_LEVEL = "INFO"
+# Number of messages waiting to be written before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has. Anything else on a record was passed with `extra=` and is logged as a field
+RECORD_ATTRIBUTES = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+# This class represents a formatter writing every record as a single line of JSON, e.g.
+#   {"time": "...", "level": "INFO", "logger": "task_manager", "message": "Tasks listed", "count": 20}
+# Values passed with `extra=` become fields of the object; values JSON cannot represent are written with str().
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# This class represents a handler that only puts records on a queue, so the thread that logs never waits
+# for the output. When the queue is full (the output cannot keep up) records are dropped and counted
+# instead of blocking the caller.
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=None, stream=None):
+    """
+    Sends the log records of the process (root logger) through a queue to a background thread that writes
+    them as JSON lines. Returns the started `QueueListener`; call its `stop()` on shutdown to write the
+    records still queued.
+
+    :param level: The lowest level that is logged. Defaults to TASK_LOG_LEVEL, or INFO.
+    :param stream: Where the records are written. Defaults to stderr.
+    """
+    level = level or os.environ.get("TASK_LOG_LEVEL", DEFAULT_LOG_LEVEL)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    # Records below the level are discarded by the logger itself, before anything is formatted or queued
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return listener
@@ -0,0 +1,212 @@
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from time import perf_counter
+
+# Upper bounds (in seconds) of the latency histogram buckets
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Type and description of every metric, in the order they are rendered
+METRICS_HELP = {
+    "task_http_request_duration_seconds": ("histogram", "Time spent handling a request, per route"),
+    "task_db_query_duration_seconds": ("histogram", "Time spent executing a SQL statement"),
+    "task_db_query_rows_total": ("counter", "Rows returned or changed by a SQL statement"),
+    "task_db_checkouts_total": ("counter", "Connections borrowed from the pool by connect_db"),
+    "task_db_checkins_total": ("counter", "Connections handed back to the pool by disconnect_db"),
+    "task_db_connections_opened_total": ("counter", "Physical SQLite connections opened by the pool"),
+    "task_db_connections_closed_total": ("counter", "Physical SQLite connections closed by the pool"),
+}
+
+
+# This class represents a histogram with fixed buckets. Observations are counted in the first bucket whose
+# upper bound they do not exceed; the cumulative counts Prometheus expects are only computed when rendering.
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is the +Inf bucket
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+# This class represents the registry of all metrics of the process. Recording a value is a dictionary
+# lookup and an addition under a lock. While `enabled` is False nothing is instrumented at all: the
+# servers do not install their hooks and `TaskManagerDB` hands out plain cursors.
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> value
+        self._collectors = []  # (name, type, description, function returning the value)
+
+    def observe(self, name, value, buckets, labels=()):
+        """
+        Records a value in a histogram.
+
+        :param name: The name of the metric, see `METRICS_HELP`.
+        :param value: The value to record, e.g. a duration in seconds.
+        :param buckets: The bucket bounds, used when the histogram is first created.
+        :param labels: A tuple of `(label, value)` pairs.
+        """
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, labels=()):
+        """
+        Increments a counter.
+
+        :param name: The name of the metric, see `METRICS_HELP`.
+        :param amount: The amount to add.
+        :param labels: A tuple of `(label, value)` pairs.
+        """
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_collector(self, name, metric_type, description, func):
+        """
+        Registers a value that is kept elsewhere and read when the metrics are rendered, e.g. the size of a cache.
+
+        :param name: The name of the metric.
+        :param metric_type: `gauge` or `counter`.
+        :param description: The help text of the metric.
+        :param func: A function without arguments returning the current value.
+        """
+        self._collectors.append((name, metric_type, description, func))
+
+    def reset(self):
+        """
+        Forgets every recorded value. Registered collectors are kept.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.buckets) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for name, (metric_type, description) in METRICS_HELP.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if metric_type == "histogram":
+                for (metric, labels), (counts, total, buckets) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float("inf"),), counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                    lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+        for name, metric_type, description, func in self._collectors:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {func()}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    """
+    Formats `(label, value)` pairs as `{label="value",...}`, escaping the values.
+    """
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped)) + "}"
+
+
+@lru_cache(maxsize=1024)
+def statement_label(sql):
+    """
+    Normalizes a SQL statement into a metric label: whitespace is collapsed and lists of placeholders
+    such as `IN (?, ?, ?)` are shortened to `IN (...)`, so every batch size shares one label.
+
+    :param sql: The SQL statement.
+    """
+    sql = " ".join(sql.split())
+    return re.sub(r"\(\?(?:, \?)+\)", "(...)", sql)
+
+
+# The registry used by the database layer and the servers. Disabled until a server turns it on.
+METRICS = Metrics()
+
+
+def add_cache_collectors(cache):
+    """
+    Exposes the statistics of a `TaskCache` (see cache.py) in the registry.
+
+    :param cache: The cache, e.g. `TaskManagerDB.cache`.
+    """
+    METRICS.add_collector("task_cache_hits_total", "counter", "Task cache hits", lambda: cache.stats()["hits"])
+    METRICS.add_collector("task_cache_misses_total", "counter", "Task cache misses", lambda: cache.stats()["misses"])
+    METRICS.add_collector("task_cache_evictions_total", "counter", "Tasks evicted from the cache",
+                          lambda: cache.stats()["evictions"])
+    METRICS.add_collector("task_cache_size", "gauge", "Tasks held in the cache", lambda: cache.stats()["size"])
+
+
+# This class represents a cursor that times every statement it executes and counts the rows it returns
+# (or, for writes, changes). `TaskManagerDB.connect_db` only uses it while the metrics are enabled.
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self._statement = statement_label(sql)
+        start = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._statement = statement_label(sql)
+        start = perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(perf_counter() - start)
+
+    def _record(self, elapsed):
+        labels = (("statement", self._statement),)
+        METRICS.observe("task_db_query_duration_seconds", elapsed, QUERY_BUCKETS, labels)
+        if self.rowcount > 0:
+            METRICS.inc("task_db_query_rows_total", self.rowcount, labels)
+
+    def _count_rows(self, count):
+        if count and getattr(self, "_statement", None):
+            METRICS.inc("task_db_query_rows_total", count, (("statement", self._statement),))
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._count_rows(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count_rows(len(rows))
+        return rows
@@ -0,0 +1,161 @@
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import METRICS
+
+
+# This class represents a bounded pool of SQLite connections shared by the TaskManagerDB methods.
+class ConnectionPool:
+    def __init__(self, db_name, max_size=5, timeout=30.0, health_check_interval=30.0, pragmas=None,
+                 cached_statements=128):
+        """
+        Initializes the pool. Connections are opened lazily, so creating a pool never touches the database file.
+
+        :param db_name: The path of the SQLite database file the connections point at.
+        :param max_size: The maximum number of connections that can be checked out at the same time.
+        :param timeout: How long (in seconds) a thread waits for a free connection before giving up.
+        :param health_check_interval: Connections that have been idle for longer than this many seconds
+        are pinged with `SELECT 1` before being handed out again.
+        :param pragmas: A dictionary of `PRAGMA` names and values applied to every new connection.
+        :param cached_statements: The number of prepared statements each connection keeps for reuse
+        (sqlite3's `cached_statements`). As connections are reused, so are their prepared statements.
+        """
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.pragmas = dict(pragmas or {})
+        self.cached_statements = cached_statements
+        for name, value in self.pragmas.items():
+            # Pragmas cannot be bound as parameters, so only accept plain names and values
+            if not re.fullmatch(r"[a-z_]+", name) or not re.fullmatch(r"-?\w+", str(value)):
+                raise ValueError(f"Invalid pragma: {name} = {value}")
+        self._idle = queue.LifoQueue()  # Most recently used connection first, its pages are still warm
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._closed = False
+
+    def _open(self):
+        """
+        Opens a new physical connection. `check_same_thread` is disabled because a connection may be
+        used by a different thread every time it is checked out of the pool.
+        """
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if METRICS.enabled:
+            METRICS.inc("task_db_connections_opened_total")
+        return conn
+
+    def _is_healthy(self, conn):
+        """
+        Checks that an idle connection is still usable.
+
+        :param conn: The connection to ping.
+        """
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """
+        Closes a connection that will not go back into the pool.
+
+        :param conn: The connection to close.
+        """
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        if METRICS.enabled:
+            METRICS.inc("task_db_connections_closed_total")
+
+    def _checkout(self):
+        """
+        Takes an idle connection out of the pool, or opens a new one if none is available.
+        """
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def acquire(self):
+        """
+        Returns a connection for the calling thread. If the thread already holds a connection (for example
+        `find_single_task` calling `fetch_members`) the same connection is reused instead of opening another.
+
+        A nested user shares the transaction of the outer one: its `commit()` or `rollback()` also commits or
+        rolls back whatever the outer caller has written so far. Nested calls should therefore only read, or
+        wrap their writes in a `SAVEPOINT` of their own.
+        """
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None:
+            local.depth += 1
+            return conn
+
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Timed out waiting for a free database connection")
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        local.conn = conn
+        local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """
+        Gives a connection back. It only returns to the pool once the outermost user in the thread is done with it.
+
+        :param conn: The connection returned by `acquire`.
+        """
+        local = self._local
+        if getattr(local, "conn", None) is not conn:
+            # The connection (and its slot) belongs to another thread, which still uses it
+            raise sqlite3.ProgrammingError("The connection was not checked out by this thread")
+
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        local.conn = None
+
+        try:
+            # Uncommitted work is dropped, just like closing the connection used to do
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+        else:
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """
+        Closes every idle connection and stops handing out new ones. Connections that are still checked out
+        are closed as soon as they are released.
+        """
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
@@ -0,0 +1,97 @@
+from collections import namedtuple
+from collections.abc import MutableMapping
+
+# A team member as read from the `teams` table. Being a tuple, it is sent as the same
+# `[team_id, task_id, first_name, last_name]` JSON list as the plain rows used to be.
+TeamMember = namedtuple("TeamMember", ["team_id", "task_id", "first_name", "last_name"])
+# The team of tasks without members. It is shared by all of them and sent as `[]`
+NO_TEAM = ()
+
+
+# This class represents a task as returned by the database layer. It stores its fields in slots instead
+# of a per-object dictionary, which takes a fraction of the memory when many tasks are loaded at once.
+# It behaves like a (read/write) dictionary, so `task["title"]`, `task.get(...)` and `{**task}` keep
+# working, and is converted to a real dictionary only when it is sent as JSON (see `json_default`).
+# A record read with a projection only holds the requested fields; the others are missing, like absent keys.
+class TaskRecord(MutableMapping):
+    __slots__ = ("task_id", "title", "due_date", "status", "description", "flag", "priority", "teams")
+
+    def __init__(self, task_id, title, due_date, status, description, flag, priority, teams):
+        self.task_id = task_id
+        self.title = title
+        self.due_date = due_date
+        self.status = status
+        self.description = description
+        self.flag = flag
+        self.priority = priority
+        self.teams = teams
+
+    @classmethod
+    def from_fields(cls, fields):
+        """
+        Creates a record holding only some of the fields.
+
+        :param fields: `(name, value)` pairs, or a dictionary.
+        """
+        record = cls.__new__(cls)
+        for name, value in (fields.items() if isinstance(fields, dict) else fields):
+            record[name] = value
+        return record
+
+    def __getitem__(self, name):
+        if name not in TASK_RECORD_FIELDS:
+            raise KeyError(name)
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        if name not in TASK_RECORD_FIELDS:
+            raise KeyError(f"'{name}' is not a task field")
+        setattr(self, name, value)
+
+    def __delitem__(self, name):
+        if name not in TASK_RECORD_FIELDS:
+            raise KeyError(name)
+        try:
+            delattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        for name in self.__slots__:
+            if hasattr(self, name):
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        """
+        Returns a shallow copy of the record.
+        """
+        return TaskRecord.from_fields(self.items())
+
+    def to_dict(self):
+        """
+        Returns the fields that are set as a dictionary.
+        """
+        return {name: getattr(self, name) for name in self}
+
+    def __repr__(self):
+        return f"TaskRecord({self.to_dict()!r})"
+
+
+TASK_RECORD_FIELDS = frozenset(TaskRecord.__slots__)
+
+
+def json_default(value):
+    """
+    `default` hook for `json.dumps` that converts task records to dictionaries.
+
+    :param value: An object the json module cannot serialize by itself.
+    """
+    if isinstance(value, TaskRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
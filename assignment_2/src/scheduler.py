@@ -0,0 +1,262 @@
+import heapq
+import json
+import logging
+import threading
+import urllib.request
+from datetime import date, datetime, time, timedelta
+
+from db import DATE_FORMAT, DB_DATE_FORMAT, normalize_status
+
+logger = logging.getLogger(__name__)
+
+# Longest time (in seconds) the scheduler sleeps before checking the clock again, so day changes and
+# clock adjustments are picked up even when no task is due soon
+MAX_SLEEP = 60.0
+
+
+def parse_due_date(due_date):
+    """
+    Parses a due date given as `YYYY/MM/DD` (API) or `YYYY-MM-DD` (database). Returns None if it is neither.
+
+    :param due_date: The due date to parse.
+    """
+    if isinstance(due_date, date):
+        return due_date
+    for date_format in (DATE_FORMAT, DB_DATE_FORMAT):
+        try:
+            return datetime.strptime(due_date, date_format).date()
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def webhook_callback(url, timeout=5.0):
+    """
+    Returns a callback for `OverdueScheduler.add_callback` that POSTs every overdue task to `url` as
+    `{"event": "task.overdue", "task_id": ..., "due_date": "YYYY/MM/DD"}`.
+
+    :param url: The URL of the webhook sink, e.g. a local service.
+    :param timeout: How long (in seconds) to wait for the sink to answer.
+    """
+    def callback(task_id, due_date):
+        body = json.dumps({"event": "task.overdue", "task_id": task_id, "due_date": due_date.strftime(DATE_FORMAT)})
+        request = urllib.request.Request(url, data=body.encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    return callback
+
+
+# This class represents an in-process scheduler of overdue tasks. The pending tasks are kept in a min-heap
+# ordered by due date, so finding the next task to become overdue never scans the tasks. A task is overdue
+# once its due date is in the past (the day after it is due). When that happens the task moves from the
+# heap to the set of overdue tasks and the registered callbacks are called with its ID and due date.
+#
+# The scheduler is seeded from the database once and then kept up to date by `TaskManager`, which calls
+# `schedule` and `remove` after every add, update and delete. Changed tasks are not removed from the heap
+# straight away: their old entries are skipped when they come up (lazy deletion). Writes made by other
+# processes are not seen that way, so the scheduler remembers the data version its tasks reflect and
+# `refresh` applies the tasks written since then, read from the database's change log.
+#
+# Only tasks that become overdue while they are scheduled call the callbacks. A task that is already overdue
+# when the scheduler learns about it (when seeding, or when it is added with a past due date) does not.
+class OverdueScheduler:
+    def __init__(self, db=None):
+        """
+        Creates an empty scheduler.
+
+        :param db: The `TaskManagerDB` the pending tasks are seeded from by `seed`.
+        """
+        self.db = db
+        self._heap = []  # (due date, task ID) of the pending tasks that are not overdue yet
+        self._pending = {}  # Task ID -> due date, the valid heap entries
+        self._overdue = {}  # Task ID -> due date of the pending tasks that are overdue
+        self._version = None  # Data version of the database the scheduled tasks reflect
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add_callback(self, callback):
+        """
+        Registers a function called as `callback(task_id, due_date)` when a task becomes overdue.
+        Callbacks run in the scheduler thread; an exception raised by one does not affect the others.
+
+        :param callback: The function to call. See `webhook_callback` for one that calls a webhook.
+        """
+        self._callbacks.append(callback)
+
+    def seed(self, today=None):
+        """
+        Loads the pending tasks from the database. Tasks that are already overdue go straight to the
+        overdue set without calling the callbacks.
+
+        :param today: The current date. Defaults to today.
+        """
+        today = today or date.today()
+        # Read before the tasks, so a write made while seeding counts as newer and is picked up by `refresh`
+        version = self.db.data_version()
+        # The tasks are read without holding the lock, so `schedule` and `remove` calls made by writes in the
+        # meantime are not blocked by the scan. Those writes bump the data version and are applied by `refresh`.
+        heap, pending, overdue = [], {}, {}
+        for task in self.db.iter_tasks(fields=["due_date"], status="pending"):
+            due_date = parse_due_date(task["due_date"])
+            if due_date is None:
+                continue
+            if due_date < today:
+                overdue[task["task_id"]] = due_date
+            else:
+                pending[task["task_id"]] = due_date
+                heap.append((due_date, task["task_id"]))
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap, self._pending, self._overdue = heap, pending, overdue
+            self._version = version["data"] if version["success"] else None
+        self._wakeup.set()
+        return {"success": True, "message": f"{len(pending) + len(overdue)} pending tasks scheduled",
+                "data": []}
+
+    def schedule(self, task_id, due_date, status="pending", today=None):
+        """
+        Adds or updates a task. Tasks that are not pending, or whose due date cannot be parsed, are removed.
+
+        :param task_id: The ID of the task.
+        :param due_date: The due date of the task.
+        :param status: The status of the task.
+        :param today: The current date. Defaults to today.
+        """
+        due_date = parse_due_date(due_date)
+        if normalize_status(status) != "pending" or due_date is None:
+            self.remove(task_id)
+            return
+        today = today or date.today()
+        with self._lock:
+            if self._pending.get(task_id) == due_date or self._overdue.get(task_id) == due_date:
+                return
+            if due_date < today:
+                # Already overdue, so it goes straight to the overdue set like in `seed`
+                self._pending.pop(task_id, None)
+                self._overdue[task_id] = due_date
+                return
+            self._overdue.pop(task_id, None)
+            self._pending[task_id] = due_date
+            heapq.heappush(self._heap, (due_date, task_id))
+            if len(self._heap) > 2 * len(self._pending) + 1024:
+                # Too many stale entries, rebuild the heap from the valid ones
+                self._heap = [(due, task) for task, due in self._pending.items()]
+                heapq.heapify(self._heap)
+        self._wakeup.set()  # The new task may be the next one to become overdue
+
+    def refresh(self, today=None):
+        """
+        Brings the scheduler up to date with the database: the tasks written since the data version its tasks
+        reflect, including those written by other processes, are read from the change log and scheduled again.
+        The scheduler is only seeded from scratch when the log does not go back far enough.
+
+        :param today: The current date. Defaults to today.
+        """
+        if self.db is None:
+            return
+        version = self.db.data_version()
+        if not version["success"]:
+            return
+        with self._lock:
+            known = self._version
+        if known == version["data"]:
+            return
+        changes = self.db.fetch_task_changes(known, version["data"]) if known is not None else None
+        if changes is None or not changes["success"]:
+            self.seed(today)
+            return
+        for task_id, due_date, status in changes["data"]:
+            if status is None:
+                self.remove(task_id)  # Deleted
+            else:
+                self.schedule(task_id, due_date, status, today)
+        with self._lock:
+            if self._version is None or self._version < version["data"]:
+                self._version = version["data"]
+
+    def remove(self, task_id):
+        """
+        Forgets a task, e.g. because it was deleted or completed.
+
+        :param task_id: The ID of the task.
+        """
+        with self._lock:
+            self._pending.pop(task_id, None)
+            self._overdue.pop(task_id, None)
+
+    def overdue_task_ids(self, today=None):
+        """
+        Returns the IDs of the overdue tasks, earliest due date first.
+
+        :param today: The current date. Defaults to today.
+        """
+        self._notify(self._collect_overdue(today or date.today()))
+        with self._lock:
+            return [task_id for task_id, _ in sorted(self._overdue.items(), key=lambda item: (item[1], item[0]))]
+
+    def _collect_overdue(self, today):
+        """
+        Moves the tasks whose due date is before `today` from the heap to the overdue set and returns them.
+        """
+        overdue = []
+        with self._lock:
+            while self._heap and self._heap[0][0] < today:
+                due_date, task_id = heapq.heappop(self._heap)
+                if self._pending.get(task_id) != due_date:
+                    continue  # Stale entry of a changed or removed task
+                del self._pending[task_id]
+                self._overdue[task_id] = due_date
+                overdue.append((task_id, due_date))
+        return overdue
+
+    def _notify(self, overdue):
+        for task_id, due_date in overdue:
+            for callback in self._callbacks:
+                try:
+                    callback(task_id, due_date)
+                except Exception as e:
+                    logger.warning("Overdue callback failed", extra={"task_id": task_id, "error": str(e)})
+
+    def _seconds_until_next(self):
+        """
+        Returns how long to sleep until the earliest pending task becomes overdue, at most `MAX_SLEEP`.
+        """
+        with self._lock:
+            while self._heap and self._pending.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)  # Drop stale entries
+            if not self._heap:
+                return MAX_SLEEP
+            overdue_at = datetime.combine(self._heap[0][0] + timedelta(days=1), time.min)
+        return min(max((overdue_at - datetime.now()).total_seconds(), 0.0), MAX_SLEEP)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            # Picks up the tasks written by other processes, so their callbacks are called on time as well
+            self.refresh()
+            self._notify(self._collect_overdue(date.today()))
+            self._wakeup.wait(self._seconds_until_next())
+            self._wakeup.clear()
+
+    def start(self):
+        """
+        Seeds the scheduler if it has a database and starts the thread that calls the callbacks.
+        """
+        if self.db is not None:
+            self.seed()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="overdue-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the scheduler thread.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,43 +1,105 @@
-from flask import Flask, jsonify, request
+import atexit
+import json
+import os
+import sqlite3
+from datetime import date
+from time import perf_counter
+from flask import Flask, Response, g, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from task_manager import TaskManager
 from db import TaskManagerDB
+from records import json_default
+from metrics import METRICS, REQUEST_BUCKETS, add_cache_collectors
+from logs import setup_logging
+from scheduler import OverdueScheduler, webhook_callback
+from api import (EXPORT_CHUNK_SIZE, create_response, new_task_data, parse_days, parse_fields, parse_int, parse_page,
+                 parse_search, search_response, task_list_response)
+
+
+# JSON provider that also serializes the TaskRecord objects returned by the database layer
+class TaskJSONProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(o):
+        try:
+            return json_default(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+
+# JSON log lines on stderr, written by a background thread so requests never wait for the output.
+# TASK_LOG_LEVEL=DEBUG also logs every task added and listed
+log_listener = setup_logging()
+atexit.register(log_listener.stop)  # Registered first, so it runs last and writes the shutdown messages
 
 app = Flask(__name__)
-db = TaskManagerDB()
-task_manager = TaskManager(db)
-
-# Helper function for consistent response formatting
-def create_response(message, status, status_code, data=None):
-    return {
-        "message": message,
-        "status": status,
-        "status_code": status_code,
-        "data": data if data else []
-    }
+app.json = TaskJSONProvider(app)
+# Request latency and database metrics, served at /metrics (see metrics.py). Set TASK_METRICS=0 to turn
+# them off: the hooks and the endpoint are then not installed at all
+METRICS.enabled = os.environ.get("TASK_METRICS", "1") != "0"
+# WAL and relaxed syncing, see PRAGMA_PROFILES in db.py. Set TASK_WRITE_BEHIND=1 to have task writes
+# group committed by a single writer thread, see writer.py
+db = TaskManagerDB(pragmas="server", write_behind=os.environ.get("TASK_WRITE_BEHIND") == "1")
+db.migrate_db()  # Create missing tables and indexes and convert old due dates
+# Keeps the pending tasks in a heap ordered by due date and answers /tasks/overdue (see scheduler.py).
+# Set TASK_OVERDUE_WEBHOOK to a URL to have every task that becomes overdue POSTed to it
+scheduler = OverdueScheduler(db)
+if os.environ.get("TASK_OVERDUE_WEBHOOK"):
+    scheduler.add_callback(webhook_callback(os.environ["TASK_OVERDUE_WEBHOOK"]))
+scheduler.start()
+task_manager = TaskManager(db, scheduler)
+atexit.register(db.close)  # Close the pooled connections on shutdown
+atexit.register(scheduler.stop)  # Registered last, so it runs first
+
+if METRICS.enabled:
+    add_cache_collectors(db.cache)
+
+    @app.before_request
+    def start_timer():
+        g.request_start = perf_counter()
+
+    # Records the latency per route pattern (not per URL, so /tasks/find/<int:task_id> is one route).
+    # Streamed responses (/tasks/export) are timed until the response starts.
+    @app.after_request
+    def record_request(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = (("route", route), ("method", request.method), ("status", str(response.status_code)))
+        METRICS.observe("task_http_request_duration_seconds", perf_counter() - g.request_start, REQUEST_BUCKETS,
+                        labels)
+        return response
+
+    # GET /metrics: All metrics in the Prometheus text format
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+# Helper function for conditional GETs. The ETag is built from the data version, which changes on every
+# write, plus any extra parts the response depends on. Returns the ETag and, if the client already has
+# this version, the 304 response to send instead of loading any tasks.
+def check_etag(*parts):
+    version = db.data_version()
+    if not version["success"]:
+        return None, None
+    etag = "-".join(str(part) for part in (version["data"],) + parts)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return etag, response
+    return etag, None
+
+# Helper function to send a JSON response with an ETag
+def jsonify_with_etag(response, etag):
+    response = jsonify(response)
+    if etag:
+        response.set_etag(etag)
+    return response
+
 
 # POST /tasks/new: Add a new task
 @app.route('/tasks/new', methods=['POST'])
 def create_task():
-    data = request.json
-
-    # Validate required fields
-    if not data or not all(k in data for k in ("title", "due_date", "flag")):
-        response = create_response(
-            "Missing required fields: title, due_date, flag.",
-            "error",
-            400
-        )
-        return jsonify(response)
-
-    task_data = {
-        "title": data.get("title"),
-        "due_date": data.get("due_date"),
-        "status": data.get("status", "pending"),
-        "description": data.get("description", ""),
-        "flag": data["flag"],
-        "priority": data.get("priority", "low"),
-        "teams": data.get("teams", []),
-    }
+    task_data, error = new_task_data(request.json)
+    if error:
+        return jsonify(error)
 
     # Save task
     result = task_manager.add_task(task_data)
@@ -56,25 +118,135 @@ def create_task():
         )
         return jsonify(response)
 
+# POST /tasks/bulk: Add many tasks at once
+# Body: a JSON list of tasks (same format as /tasks/new) or {"tasks": [...]}
+# Optional query parameter batch_size: number of tasks inserted per batch
+@app.route('/tasks/bulk', methods=['POST'])
+def create_tasks():
+    data = request.json
+    if isinstance(data, dict):
+        data = data.get("tasks")
+    if not isinstance(data, list) or not data:
+        response = create_response(
+            "Provide a non-empty list of tasks.",
+            "error",
+            400
+        )
+        return jsonify(response)
+
+    try:
+        batch_size = parse_int(request.args.get("batch_size"))
+    except ValueError:
+        batch_size = 0
+    if batch_size is not None and batch_size < 1:
+        response = create_response("batch_size must be a positive integer.", "error", 400)
+        return jsonify(response)
+
+    result = task_manager.add_tasks(data, batch_size=batch_size)
+    if result["success"]:
+        response = create_response(
+            result["message"],
+            "success",
+            201,
+            result["data"]
+        )
+    else:
+        response = create_response(
+            result["message"],
+            "error",
+            400,
+            result["data"]
+        )
+    return jsonify(response)
+
 # GET /tasks/all: Retrieve all tasks
+# Optional query parameters:
+#   limit, cursor: keyset pagination on task_id, pass the returned next_cursor to get the next page
+#   fields: comma separated list of fields to return, e.g. fields=title,status
+#   flag, status, priority: filters
 @app.route('/tasks/all', methods=['GET'])
 def get_tasks():
-    tasks = task_manager.list_tasks()
-    message = "Tasks retrieved successfully." if len(tasks) > 0 else "No tasks found."
-    response = create_response(
-        message,
-        "success",
-        200,
-        tasks
+    etag, not_modified = check_etag()
+    if not_modified:
+        return not_modified
+
+    limit, cursor, error = parse_page(request.args.get("limit"), request.args.get("cursor"))
+    if error:
+        return jsonify(error)
+    fields, error = parse_fields(request.args.get("fields"))
+    if error:
+        return jsonify(error)
+
+    tasks = task_manager.list_tasks(
+        flag=request.args.get("flag"),
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        status=request.args.get("status"),
+        priority=request.args.get("priority"),
     )
-    return jsonify(response)
+    response = task_list_response(tasks, limit)
+    return jsonify_with_etag(response, etag)
+
+# GET /tasks/export: Stream all tasks as newline delimited JSON (one task per line)
+# Accepts the same fields, flag, status and priority parameters as /tasks/all
+@app.route('/tasks/export', methods=['GET'])
+def export_tasks():
+    fields, error = parse_fields(request.args.get("fields"))
+    if error:
+        return jsonify(error)
+    tasks = db.iter_tasks(
+        chunk_size=EXPORT_CHUNK_SIZE,
+        fields=fields,
+        flag=request.args.get("flag"),
+        status=request.args.get("status"),
+        priority=request.args.get("priority"),
+    )
+
+    def generate():
+        lines = []
+        try:
+            for task in tasks:
+                lines.append(json.dumps(task, separators=(",", ":"), default=json_default))
+                if len(lines) == EXPORT_CHUNK_SIZE:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+        except sqlite3.Error as e:
+            lines.append(json.dumps({"error": f"Export aborted: {e}"}))
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# GET /tasks/search?q=<words>: Search the task titles and descriptions, best matches first.
+# Optional parameters: limit (default 20), offset and fields (see /tasks/all)
+@app.route('/tasks/search', methods=['GET'])
+def search_tasks():
+    query, limit, offset, error = parse_search(request.args.get("q"), request.args.get("limit"),
+                                               request.args.get("offset"))
+    if error:
+        return jsonify(error)
+    fields, error = parse_fields(request.args.get("fields"))
+    if error:
+        return jsonify(error)
+
+    etag, not_modified = check_etag()
+    if not_modified:
+        return not_modified
+    result = task_manager.search_tasks(query, limit=limit, offset=offset, fields=fields)
+    if not result["success"]:
+        return jsonify(create_response(result["message"], "error", 500))
+    return jsonify_with_etag(search_response(result["data"], limit, offset), etag)
 
 # GET /tasks/find/<task_id>: Retrieve a task by ID
 @app.route('/tasks/find/<int:task_id>', methods=['GET'])
 def get_task_by_id(task_id):
     # print("The task ID received is: ",task_id)
+    etag, not_modified = check_etag()
+    if not_modified:
+        return not_modified
     task = task_manager.find_task(task_id)
-    return jsonify(task)
+    return jsonify_with_etag(task, etag)
 
 # UPDATE /tasks/update<task_id>: update a task by ID
 @app.route('/tasks/update/<int:task_id>', methods=['PUT'])
@@ -113,6 +285,9 @@ def delete_task(task_id):
 # GET /tasks/pending: Retrieve all pending tasks
 @app.route('/tasks/pending', methods=['GET'])
 def get_pending_tasks():
+    etag, not_modified = check_etag()
+    if not_modified:
+        return not_modified
     tasks = task_manager.get_pending_tasks()
     if not tasks:
         response = create_response(
@@ -120,18 +295,22 @@ def get_pending_tasks():
             "error",
             404
         )
-        return jsonify(response)
+        return jsonify_with_etag(response, etag)
     response = create_response(
         "Pending tasks retrieved successfully.",
         "success",
         200,
         tasks
     )
-    return jsonify(response)
+    return jsonify_with_etag(response, etag)
 
 # GET /tasks/overdue: Retrieve all overdue tasks
 @app.route('/tasks/overdue', methods=['GET'])
 def get_overdue_tasks():
+    # Tasks become overdue as days pass, so the date is part of the ETag
+    etag, not_modified = check_etag(date.today().isoformat())
+    if not_modified:
+        return not_modified
     tasks = task_manager.get_overdue_tasks()
     if not tasks:
         response = create_response(
@@ -139,14 +318,54 @@ def get_overdue_tasks():
             "error",
             404
         )
-        return jsonify(response)
+        return jsonify_with_etag(response, etag)
     response = create_response(
         "Overdue tasks retrieved successfully.",
         "success",
         200,
         tasks
     )
-    return jsonify(response)
+    return jsonify_with_etag(response, etag)
+
+# GET /tasks/stats: Number of tasks per status, flag and priority, and number of overdue tasks
+@app.route('/tasks/stats', methods=['GET'])
+def get_task_stats():
+    # The overdue count changes as days pass, so the date is part of the ETag
+    etag, not_modified = check_etag(date.today().isoformat())
+    if not_modified:
+        return not_modified
+    result = task_manager.get_stats()
+    if not result["success"]:
+        return jsonify(create_response(result["message"], "error", 500))
+    response = create_response(
+        "Task statistics retrieved successfully.",
+        "success",
+        200,
+        result["data"]
+    )
+    return jsonify_with_etag(response, etag)
+
+# GET /tasks/analytics: Overdue and upcoming pending tasks, and task counts per status, priority and team member
+#   days: number of days ahead counted as upcoming (default 7)
+@app.route('/tasks/analytics', methods=['GET'])
+def get_task_analytics():
+    days, error = parse_days(request.args.get("days"))
+    if error:
+        return jsonify(error)
+    # The overdue and upcoming tasks change as days pass, so the date is part of the ETag
+    etag, not_modified = check_etag(date.today().isoformat(), days)
+    if not_modified:
+        return not_modified
+    result = task_manager.get_analytics(days)
+    if not result["success"]:
+        return jsonify(create_response(result["message"], "error", 500))
+    response = create_response(
+        "Task analytics retrieved successfully.",
+        "success",
+        200,
+        result["data"]
+    )
+    return jsonify_with_etag(response, etag)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -174,3 +393,12 @@ if __name__ == '__main__':
 
 # # Retrieve overdue tasks
 # # curl -X GET http://127.0.0.1:5000/tasks/overdue
+
+# # Search tasks
+# # curl -X GET "http://127.0.0.1:5000/tasks/search?q=project+documentation&limit=10"
+
+# # Retrieve task statistics
+# # curl -X GET http://127.0.0.1:5000/tasks/stats
+
+# # Retrieve the metrics
+# # curl -X GET http://127.0.0.1:5000/metrics
@@ -0,0 +1,149 @@
+from functools import lru_cache
+
+# The columns of the tables, in the order the rows are unpacked in. Queries always name their columns,
+# so the unpacking does not depend on the order the columns were created in.
+TASK_COLUMNS = "task_id, title, due_date, status, description, flag, priority"
+TEAM_COLUMNS = "team_id, task_id, first_name, last_name"
+
+# Size of sqlite3's per-connection cache of prepared statements (`cached_statements`, 128 by default).
+# Every distinct SQL string is parsed once per pooled connection and then reused from the cache. It has
+# room for the named statements below, the filter and projection variants of the task listing queries
+# and the `IN (...)` statements, whose number of placeholders is rounded up (see `in_list_size`).
+STATEMENT_CACHE_SIZE = 512
+
+# The SQL statements run by `TaskManagerDB` (see db.py), by name. The schema (tables, indexes and
+# triggers) is created in db.py; everything that runs per request is here.
+STATEMENTS = {
+    # Data version
+    "bump_version": '''UPDATE db_version SET version = version + 1 WHERE id = 1''',
+    "select_version": '''SELECT version FROM db_version WHERE id = 1''',
+
+    # Tasks
+    "insert_task": '''INSERT INTO task_manager (title, due_date, status, description, flag, priority)
+                      VALUES (?, ?, ?, ?, ?, ?)''',
+    "select_task": f'''SELECT {TASK_COLUMNS} FROM task_manager WHERE task_id = ?''',
+    "update_task": '''UPDATE task_manager
+                      SET title = ?, due_date = ?, status = ?, description = ?, flag = ?, priority = ?
+                      WHERE task_id = ?''',
+    "delete_task": '''DELETE FROM task_manager WHERE task_id = ?''',
+    "select_last_task_id": """SELECT seq FROM sqlite_sequence WHERE name = 'task_manager'""",
+
+    # Tasks written since a data version, from the log filled by the triggers
+    "select_task_changes": '''SELECT changed.task_id, task_manager.due_date, task_manager.status
+                              FROM (SELECT DISTINCT task_id FROM task_changes WHERE version > ? AND version <= ?) AS changed
+                              LEFT JOIN task_manager ON task_manager.task_id = changed.task_id''',
+
+    # Team members
+    "insert_team_member": '''INSERT INTO teams (task_id, first_name, last_name) VALUES (?, ?, ?)''',
+    "select_team": f'''SELECT {TEAM_COLUMNS} FROM teams WHERE task_id = ? ORDER BY team_id''',
+    "select_team_names": '''SELECT team_id, first_name, last_name FROM teams WHERE task_id = ? ORDER BY team_id''',
+    "update_team_member": '''UPDATE teams SET first_name = ?, last_name = ? WHERE team_id = ? AND task_id = ?''',
+    "delete_team_member": '''DELETE FROM teams WHERE team_id = ? AND task_id = ?''',
+    "delete_team": '''DELETE FROM teams WHERE task_id = ?''',
+
+    # Counters maintained by the triggers
+    "select_stats": '''SELECT dimension, value, count FROM task_stats WHERE count > 0''',
+    "count_overdue": '''SELECT IFNULL(SUM(count), 0) FROM pending_due_counts WHERE due_date < ?''',
+    "clear_stats": '''DELETE FROM task_stats''',
+    "clear_pending_due_counts": '''DELETE FROM pending_due_counts''',
+    "count_pending_due_dates": '''INSERT INTO pending_due_counts (due_date, count)
+                                  SELECT due_date, COUNT(*) FROM task_manager
+                                  WHERE status = 'pending' GROUP BY due_date''',
+
+    # Columns read by analytics.py. Missing values are counted as 'none' like in `task_stats`, and due dates
+    # that are not ISO dates are read as NULL
+    "select_analytics_columns": """SELECT task_id,
+                                          CASE WHEN due_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+                                               THEN due_date END,
+                                          IFNULL(status, 'none'), IFNULL(priority, 'none')
+                                   FROM task_manager ORDER BY task_id""",
+    "select_member_names": """SELECT task_id, TRIM(IFNULL(first_name, '') || ' ' || IFNULL(last_name, '')) FROM teams""",
+
+    # Full-text search
+    "search_task_ids": '''SELECT rowid FROM task_fts WHERE task_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?''',
+    "set_search_rank": '''INSERT INTO task_fts (task_fts, rank) VALUES ('rank', ?)''',
+    "rebuild_search_index": '''INSERT INTO task_fts (task_fts) VALUES ('rebuild')''',
+    "optimize_search_index": '''INSERT INTO task_fts (task_fts) VALUES ('optimize')''',
+
+    # Migrations
+    "select_slash_due_dates": """SELECT task_id, due_date FROM task_manager WHERE due_date LIKE '%/%'""",
+    "update_due_date": '''UPDATE task_manager SET due_date = ? WHERE task_id = ?''',
+    "normalize_statuses": '''UPDATE task_manager SET status = LOWER(TRIM(status)) WHERE status != LOWER(TRIM(status))''',
+}
+
+# The columns `task_stats` counts the tasks by, as `dimension: SQL expression`
+STATS_DIMENSIONS = {"status": "status", "flag": "flag", "priority": "IFNULL(priority, 'none')"}
+
+
+def sql(name):
+    """
+    Returns the SQL of a named statement.
+
+    :param name: The name of the statement, a key of `STATEMENTS`.
+    """
+    return STATEMENTS[name]
+
+
+@lru_cache(maxsize=None)
+def count_stats_sql(dimension):
+    """
+    Returns the statement that fills the `task_stats` counters of one dimension.
+
+    :param dimension: A key of `STATS_DIMENSIONS`.
+    """
+    column = STATS_DIMENSIONS[dimension]
+    return f'''INSERT INTO task_stats (dimension, value, count)
+               SELECT ?, {column}, COUNT(*) FROM task_manager GROUP BY {column}'''
+
+
+@lru_cache(maxsize=1024)
+def select_tasks_sql(columns, where=""):
+    """
+    Returns the query reading `columns` of the tasks matching `where`.
+
+    :param columns: The columns to read, as a comma separated string.
+    :param where: An optional SQL condition, including the `WHERE` keyword, and `ORDER BY`/`LIMIT` clauses.
+    """
+    return f'''SELECT {columns} FROM task_manager {where}'''
+
+
+@lru_cache(maxsize=None)
+def placeholders(count):
+    """
+    Returns `?, ?, ...` with `count` placeholders.
+    """
+    return ", ".join("?" * count)
+
+
+def in_list_size(count, limit):
+    """
+    Rounds the number of values bound into an `IN (...)` list up to a power of two (at most `limit`), so
+    the lists of any length share a handful of prepared statements instead of one per length.
+
+    :param count: The number of values.
+    :param limit: The largest list size used.
+    """
+    size = 1
+    while size < count:
+        size *= 2
+    return min(size, limit)
+
+
+def in_list(values, limit):
+    """
+    Returns the placeholders and parameters of an `IN (...)` list of `values`, padded to `in_list_size`
+    by repeating the last value (which does not change the result of `IN`).
+
+    :param values: A non-empty list of values.
+    :param limit: The largest list size used.
+    """
+    size = in_list_size(len(values), limit)
+    return placeholders(size), list(values) + [values[-1]] * (size - len(values))
+
+
+@lru_cache(maxsize=None)
+def select_teams_in_sql(count):
+    """
+    Returns the query reading the team members of `count` tasks at once, ordered by task.
+    """
+    return f'''SELECT {TEAM_COLUMNS} FROM teams WHERE task_id IN ({placeholders(count)}) ORDER BY task_id, team_id'''
@@ -3,6 +3,8 @@ from db import TaskManagerDB
 
 """ Super Class (Task) for managing creation of task, setting description and outputting the task details """
 class Task:
+    __slots__ = ("_task_id", "title", "due_date", "status", "_description", "flag")  # No per-object __dict__
+
     def __init__(self, title, due_date, flag):
         self._task_id = None
         self.title = title
@@ -44,6 +46,8 @@ class Task:
 
 """Sub-class for managing personal tasks"""
 class PersonalTask(Task):
+    __slots__ = ("priority",)
+
     def __init__(self, title, due_date):
         super().__init__(title, due_date, 'personal')
         self.priority = "low"
@@ -69,6 +73,8 @@ class PersonalTask(Task):
 
 """Sub-class for managing work tasks"""
 class WorkTask(Task):
+    __slots__ = ("team_members",)
+
     def __init__(self, title, due_date):
         super().__init__(title, due_date, 'work')
         self.team_members = []
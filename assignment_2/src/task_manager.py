@@ -1,46 +1,83 @@
 import csv
-from datetime import datetime
-from task import Task, PersonalTask, WorkTask
+import logging
+import analytics
+from task import Task
 from db import TaskManagerDB
+from lazy_tasks import LazyTaskCollection
+
+logger = logging.getLogger(__name__)
+
+# The fields `load_task` reads up front. The team members are read by `LazyTaskCollection` when they are needed
+LAZY_LOAD_FIELDS = ["title", "due_date", "status", "description", "flag", "priority"]
 
 
 class TaskManager:
-    def __init__(self, db) -> None:
+    def __init__(self, db, scheduler=None) -> None:
         self.db = db  # Assign the database instance
+        self.scheduler = scheduler  # Optional OverdueScheduler, kept up to date by every add, update and delete
+        self._analytics = None  # (data version, TaskColumns) of the last analytics request
+
+    def _schedule(self, task_id, task):
+        """
+        Passes the due date and status of an added or updated task on to the overdue scheduler.
+        """
+        if self.scheduler is not None:
+            self.scheduler.schedule(task_id, task.get("due_date"), task.get("status", "pending"))
 
     def add_task(self, task_data):
-        print(task_data)
         """
         Add a task to the task list. Supports both Task objects and dictionary-based data.
         """
         if isinstance(task_data, dict):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Adding task", extra={"task": dict(task_data)})
             # Trigger save to db
             return self.save_task(task_data)  
         else:
             return {"success": False, "message": "The input data for task should be an instance of a Task Class", "data": []} 
 
-    def list_tasks(self, flag=None):
+    def add_tasks(self, tasks, batch_size=None):
+        """
+        Add many tasks at once. The tasks are saved in a single transaction with batched inserts.
+        Invalid tasks are skipped and reported by their position in the list.
+        """
+        if not isinstance(tasks, list):
+            return {"success": False, "message": "The input data for tasks should be a list of tasks", "data": []}
+        if batch_size is None:
+            result = self.db.save_many_to_db(tasks)
+        else:
+            result = self.db.save_many_to_db(tasks, batch_size=batch_size)
+        if result["success"]:
+            # The IDs belong to the tasks that were not rejected, in order
+            rejected = {error["index"] for error in result["data"]["errors"]}
+            saved = [task for index, task in enumerate(tasks) if index not in rejected]
+            for task_id, task in zip(result["data"]["task_ids"], saved):
+                self._schedule(task_id, task)
+        return result
+
+    def list_tasks(self, flag=None, limit=None, cursor=None, fields=None, status=None, priority=None):
         """
         List tasks, optionally filtered by the task flag (e.g., PersonalTask or WorkTask).
+        The filters, the page (`limit` tasks after the `cursor` task ID) and the projection on `fields`
+        are applied by the database.
         """
-        tasks = self.db.load_from_db()["data"]
+        tasks = self.db.load_from_db(limit=limit, after_id=cursor, fields=fields,
+                                     flag=flag, status=status, priority=priority)["data"]
         if not tasks:
-            print("There are no tasks!")
+            logger.debug("There are no tasks!")
             return []
 
-        results = []
-        for task in tasks:
-            if flag is None or task.get("flag") == flag:
-                results.append(task)
-                print(task)
-        print("\n")
-        return results
+        logger.debug("Tasks listed", extra={"count": len(tasks)})
+        return tasks
 
     def delete_task(self, task_id):
         """
         Delete a task by ID from the database.
         """
-        return self.db.delete_from_db(task_id)
+        result = self.db.delete_from_db(task_id)
+        if result["success"] and self.scheduler is not None:
+            self.scheduler.remove(task_id)
+        return result
     
     def update_task(self, task_id, updated_data):
         """
@@ -71,6 +108,7 @@ class TaskManager:
 
         # Return the response from the database update operation
         if result["success"]:
+            self._schedule(task_id, result["data"])
             return {
                 "success": True,
                 "message": result["message"],
@@ -105,6 +143,7 @@ class TaskManager:
         # Save the task data to the database
         result = self.db.save_to_db(task_data)
         if result["success"]:
+            self._schedule(result["data"]["task_id"], task_data)
             return {"success": True, "message": "Task saved successfully.", "data": result["data"]}
         else:
             return {"success": False, "message": result["message"], "data": []}
@@ -113,32 +152,17 @@ class TaskManager:
 
     def load_task(self):
         """
-        Load tasks from the database into the TaskManager.
+        Load the tasks from the database. Returns a `LazyTaskCollection` of `WorkTask`/`PersonalTask` objects,
+        not the list of task records `list_tasks` returns (which `load_task` used to return): it is a read-only
+        sequence, so it can be indexed, sliced and iterated, and `list(...)` turns it into a list. The tasks are
+        read in one go, and a task is only built (and the team members of its block of tasks read) when it is
+        accessed. The plain records are available as its `records`.
         """
-        rows = self.db.load_from_db()["data"]
-
-        if not rows:
-            return []
-        else:
-            for row in rows:
-                # Create the appropriate task object based on the flag
-                if row["flag"] == "work":
-                    task = WorkTask(row["title"], row["due_date"])
-                    members = self.db.fetch_members(row["task_id"])
-                    for member in members:
-                        task.add_team_member(f"{member[2]} {member[3]}")
-                else:
-                    task = PersonalTask(row["title"], row["due_date"])
-
-                # Set additional properties
-                task.set_description(row.get("description", ""))
-                task.set_task_id(row["task_id"])
-
-                # Add to tasks list
-                self.add_task(task)
-
-            print("Tasks loaded from the Database.")
-        return self.list_tasks()
+        rows = self.db.load_from_db(fields=LAZY_LOAD_FIELDS)["data"]
+        tasks = LazyTaskCollection(rows, self.db)
+        if rows:
+            logger.info("Tasks loaded from the Database.", extra={"count": len(rows)})
+        return tasks
     
     def find_task(self, task_id):
         """
@@ -147,27 +171,65 @@ class TaskManager:
         task = self.db.find_single_task(task_id)
         return task
 
+    def search_tasks(self, query, limit=20, offset=0, fields=None):
+        """
+        Search the task titles and descriptions. The best matches come first.
+        """
+        return self.db.search_tasks(query, limit=limit, offset=offset, fields=fields)
+
     def get_pending_tasks(self):
         """
-        Get all pending tasks.
+        Get all pending tasks. The filtering is done by the database.
         """
-        tasks = self.db.load_from_db()["data"]
-        return [task for task in tasks if task["status"].strip().lower() == "pending"]
+        return self.db.fetch_pending_tasks()["data"]
 
     def get_overdue_tasks(self):
         """
-        Get all overdue tasks.
+        Get all overdue tasks. With a scheduler the overdue tasks are known already and only they are
+        loaded; otherwise the filtering is done by the database. The scheduler first applies the tasks
+        written by other processes since it was last brought up to date.
+        """
+        if self.scheduler is not None:
+            self.scheduler.refresh()
+            return self.db.fetch_tasks_by_id(self.scheduler.overdue_task_ids())["data"]
+        return self.db.fetch_overdue_tasks()["data"]
+
+    def get_stats(self):
+        """
+        Get the number of tasks per status, flag and priority, and the number of overdue tasks.
+        The counts are maintained by the database, so no tasks are loaded.
+        """
+        return self.db.fetch_stats()
+
+    def get_analytics(self, days=7, today=None):
+        """
+        Get the overdue and upcoming pending tasks and the task counts per status, priority and team member,
+        computed on NumPy columns (see analytics.py). The columns are only read from the database again
+        when the data version has changed since the previous call.
+
+        :param days: The number of days ahead counted as upcoming.
+        :param today: The date the overdue and upcoming tasks are counted against. Defaults to the current date.
         """
-        tasks = self.db.load_from_db()["data"]
-        current_date = datetime.now().date()
-        return [task for task in tasks if task["status"] == "pending" and datetime.strptime(task["due_date"], '%Y/%m/%d').date() < current_date]
+        if not analytics.available():
+            return {"success": False, "message": analytics.NUMPY_MISSING, "data": {}}
 
+        version = self.db.data_version()
+        cached = self._analytics
+        if version["success"] and cached is not None and cached[0] == version["data"]:
+            columns = cached[1]
+        else:
+            result = self.db.fetch_analytics_rows()
+            if not result["success"]:
+                return result
+            columns = analytics.TaskColumns(result["data"]["tasks"], result["data"]["members"])
+            if version["success"]:
+                self._analytics = (version["data"], columns)
+        return {"success": True, "message": "Task analytics computed successfully", "data": columns.summary(today, days)}
 
 # Example usage
 if __name__ == "__main__":
     db = TaskManagerDB()  # Create database instance
-    db.create_task_table()
-    db.create_teams_table()
+    db.migrate_db()
     task_manager = TaskManager(db)
 
     # # Load tasks from the database
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+from db import TaskManagerDB
+from task_manager import TaskManager
+
+TODAY = date(2025, 6, 1)
+DAYS = 7
+
+
+def task(title, due_date, status="pending", priority="low", teams=()):
+    return {"title": title, "due_date": due_date, "status": status, "description": "Test task",
+            "flag": "work" if teams else "personal", "priority": priority,
+            "teams": [{"first_name": first, "last_name": last} for first, last in teams]}
+
+
+# This class represents the tests of the NumPy task analytics. Every count of the summary is compared with the
+# same count computed by a plain SQL query on the database file.
+@unittest.skipUnless(analytics.available(), analytics.NUMPY_MISSING)
+class TaskAnalyticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.db")
+        self.db = TaskManagerDB(self.path)
+        self.db.migrate_db()
+        self.db.save_many_to_db([
+            task("Overdue", "2025/05/01", priority="high", teams=[("Ann", "Lee"), ("Bob", "Ray")]),
+            task("Overdue too", "2025/05/31", priority="medium"),
+            task("Due today", "2025/06/01", teams=[("Ann", "Lee")]),
+            task("Due in a week", "2025/06/08", priority="high"),
+            task("Due later", "2025/06/09", teams=[("Bob", "Ray")]),
+            task("Completed", "2025/05/01", status="completed", priority="high", teams=[("Ann", "Lee")]),
+            task("In progress", "2025/06/03", status="in progress", priority="medium"),
+        ])
+        self.conn = sqlite3.connect(self.path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.db.close()
+        self.tmp.cleanup()
+
+    def count(self, query, *params):
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def expected(self, where, *params):
+        """The total, pending, overdue and due_within counts of the tasks matching `where`"""
+        today, end = TODAY.isoformat(), date.fromordinal(TODAY.toordinal() + DAYS).isoformat()
+        return {
+            "total": self.count(f"SELECT COUNT(*) FROM task_manager WHERE {where}", *params),
+            "pending": self.count(f"SELECT COUNT(*) FROM task_manager WHERE {where} AND status = 'pending'", *params),
+            "overdue": self.count(f"SELECT COUNT(*) FROM task_manager WHERE {where} AND status = 'pending' "
+                                  f"AND due_date < ?", *params, today),
+            "due_within": self.count(f"SELECT COUNT(*) FROM task_manager WHERE {where} AND status = 'pending' "
+                                     f"AND due_date BETWEEN ? AND ?", *params, today, end),
+        }
+
+    def assertSummaryMatchesDatabase(self):
+        summary = TaskManager(self.db).get_analytics(DAYS, TODAY)["data"]
+
+        totals = self.expected("1")
+        self.assertEqual({key: summary[key] for key in totals}, totals)
+        self.assertEqual(summary["by_status"], dict(self.conn.execute(
+            "SELECT status, COUNT(*) FROM task_manager GROUP BY status").fetchall()))
+
+        priorities = [row[0] for row in self.conn.execute("SELECT DISTINCT priority FROM task_manager")]
+        self.assertEqual(summary["by_priority"], {priority: self.expected("priority = ?", priority)
+                                                  for priority in priorities})
+
+        members = self.conn.execute("SELECT DISTINCT first_name, last_name FROM teams").fetchall()
+        member_tasks = "task_id IN (SELECT task_id FROM teams WHERE first_name = ? AND last_name = ?)"
+        self.assertEqual(summary["by_member"], {f"{first} {last}": self.expected(member_tasks, first, last)
+                                                for first, last in members})
+
+    def test_summary_counts_match_the_database(self):
+        self.assertSummaryMatchesDatabase()
+        self.assertEqual(self.count("SELECT COUNT(*) FROM task_manager WHERE due_date < ? AND status = 'pending'",
+                                    TODAY.isoformat()), 2)
+
+    def test_summary_follows_writes(self):
+        self.assertSummaryMatchesDatabase()
+        self.db.save_to_db(task("Added", "2025/04/01", priority="medium", teams=[("Cid", "Fox")]))
+        self.db.delete_from_db(1)
+        self.assertSummaryMatchesDatabase()
+
+    def test_no_tasks(self):
+        summary = analytics.TaskColumns([], []).summary(TODAY, DAYS)
+        self.assertEqual((summary["total"], summary["pending"], summary["overdue"], summary["due_within"]), (0, 0, 0, 0))
+        self.assertEqual((summary["by_status"], summary["by_priority"], summary["by_member"]), ({}, {}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import TaskManagerDB
+
+
+def task(title):
+    return {"title": title, "due_date": "2030/01/01", "status": "pending", "description": "Test task",
+            "flag": "personal", "priority": "low"}
+
+
+# This class represents the tests of the find_single_task cache, with two TaskManagerDB objects on the same
+# file standing in for two processes.
+class TaskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "test.db")
+        self.db = TaskManagerDB(path)
+        self.db.migrate_db()
+        self.db.cache.check_interval = 0  # Compare the data version on every lookup
+        self.other = TaskManagerDB(path)
+        self.first = self.db.save_to_db(task("First"))["data"]["task_id"]
+        self.second = self.db.save_to_db(task("Second"))["data"]["task_id"]
+
+    def tearDown(self):
+        self.db.close()
+        self.other.close()
+        self.tmp.cleanup()
+
+    def test_write_from_other_process_drops_the_cache(self):
+        self.db.find_single_task(self.first)
+        self.db.find_single_task(self.second)
+        self.other.update_in_db(self.first, task("First, changed"))
+
+        self.assertEqual(self.db.find_single_task(self.first)["data"]["title"], "First, changed")
+        # Nothing tells which task the other process wrote, so every task was dropped
+        self.db.find_single_task(self.second)
+        self.assertEqual(self.db.cache.stats()["hits"], 0)
+
+    def test_local_write_only_drops_its_task(self):
+        self.db.find_single_task(self.first)
+        self.db.find_single_task(self.second)
+        self.db.update_in_db(self.second, task("Second, changed"))
+
+        self.assertEqual(self.db.find_single_task(self.first)["data"]["title"], "First")
+        self.assertEqual(self.db.cache.stats()["hits"], 1)
+        self.assertEqual(self.db.find_single_task(self.second)["data"]["title"], "Second, changed")
+        self.assertEqual(self.db.cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# This class represents the tests of the conditional GETs of server.py. The server opens `manager.db` in the
+# working directory, so it is imported (and runs) inside a temporary directory.
+class ETagTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.cwd = os.getcwd()
+        os.chdir(cls.tmp.name)
+        cls.server = importlib.import_module("server")
+        cls.client = cls.server.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.scheduler.stop()
+        cls.server.db.close()
+        os.chdir(cls.cwd)
+        cls.tmp.cleanup()
+
+    def add_task(self, title):
+        response = self.client.post("/tasks/new", json={"title": title, "due_date": "2030/01/01", "flag": "personal",
+                                                        "description": "Test task"})
+        self.assertEqual(response.get_json()["status_code"], 201)
+
+    def test_all_tasks_not_modified_until_a_write(self):
+        self.add_task("First")
+        response = self.client.get("/tasks/all")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        response = self.client.get("/tasks/all", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+        self.add_task("Second")
+        response = self.client.get("/tasks/all", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual([task["title"] for task in response.get_json()["data"]][-2:], ["First", "Second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import TaskManagerDB
+from lazy_tasks import LazyTaskCollection
+from task import PersonalTask, WorkTask
+from task_manager import TaskManager
+
+
+def task(title, teams=()):
+    return {"title": title, "due_date": "2025/06/01", "status": "pending", "description": "Test task",
+            "flag": "work" if teams else "personal", "priority": "low",
+            "teams": [{"first_name": first, "last_name": last} for first, last in teams]}
+
+
+# This class represents the tests of the LazyTaskCollection returned by TaskManager.load_task
+class LazyTaskCollectionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = TaskManagerDB(os.path.join(self.tmp.name, "test.db"))
+        self.db.migrate_db()
+        self.db.save_many_to_db([task("Personal"), task("Work", [("Ann", "Lee"), ("Bob", "Ray")]),
+                                 task("Work alone", [("Cid", "Fox")]), task("Another personal")])
+        self.db.delete_from_db(1)  # Leaves a gap in the task IDs
+        self.team_queries = 0
+        fetch_teams = self.db.fetch_teams
+
+        def counting_fetch_teams(task_ids):
+            self.team_queries += 1
+            return fetch_teams(task_ids)
+        self.db.fetch_teams = counting_fetch_teams
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_load_task_builds_tasks_on_access(self):
+        tasks = TaskManager(self.db).load_task()
+        self.assertIsInstance(tasks, LazyTaskCollection)
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(tasks.hydrated(), 0)
+        self.assertEqual(list(tasks.values("title")), ["Work", "Work alone", "Another personal"])
+        self.assertEqual(tasks.hydrated(), 0)
+
+        last = tasks[-1]
+        self.assertIsInstance(last, PersonalTask)
+        self.assertIs(tasks.get(4), last)
+        self.assertEqual(tasks.hydrated(), 1)
+        self.assertEqual(self.team_queries, 0)
+
+        self.assertEqual([t.get_task_id() for t in tasks], [2, 3, 4])
+        self.assertEqual(tasks.hydrated(), 3)
+
+    def test_get_returns_none_for_missing_tasks(self):
+        tasks = TaskManager(self.db).load_task()
+        for task_id in (0, 1, 5):
+            self.assertIsNone(tasks.get(task_id))
+        self.assertEqual(tasks.hydrated(), 0)
+
+    def test_team_members_are_read_on_hydration(self):
+        tasks = TaskManager(self.db).load_task()
+        work = tasks.get(2)
+        self.assertIsInstance(work, WorkTask)
+        self.assertEqual(work.team_members, ["Ann Lee", "Bob Ray"])
+        self.assertEqual(tasks.get(3).team_members, ["Cid Fox"])
+        # Both work tasks are in the same block, read with one query
+        self.assertEqual(self.team_queries, 1)
+        self.assertEqual(tasks.hydrated(), 2)
+
+    def test_team_members_are_read_by_block(self):
+        with mock.patch("lazy_tasks.TEAM_BLOCK_SIZE", 1):
+            tasks = TaskManager(self.db).load_task()
+            self.assertEqual(tasks.get(3).team_members, ["Cid Fox"])
+            self.assertEqual(self.team_queries, 1)
+            self.assertEqual(tasks.get(2).team_members, ["Ann Lee", "Bob Ray"])
+            self.assertEqual(self.team_queries, 2)
+            tasks.get(4)
+            self.assertEqual(self.team_queries, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import TaskManagerDB
+from scheduler import OverdueScheduler
+
+TODAY = date(2025, 6, 1)
+
+
+def task(title, due_date, status="pending"):
+    return {"title": title, "due_date": due_date, "status": status, "description": "Test task", "flag": "personal",
+            "priority": "low"}
+
+
+# This class represents the tests of OverdueScheduler. Writes through a second TaskManagerDB on the same file
+# stand in for writes made by another process.
+class OverdueSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "test.db")
+        self.db = TaskManagerDB(path)
+        self.db.migrate_db()
+        self.other = TaskManagerDB(path)
+        self.old = self.db.save_to_db(task("Old", "2025/05/01"))["data"]["task_id"]
+        self.scheduler = OverdueScheduler(self.db)
+        self.scheduler.seed(TODAY)
+        self.seeds = 0
+        seed = self.scheduler.seed
+
+        def counting_seed(today=None):
+            self.seeds += 1
+            return seed(today)
+        self.scheduler.seed = counting_seed
+
+    def tearDown(self):
+        self.db.close()
+        self.other.close()
+        self.tmp.cleanup()
+
+    def overdue(self):
+        self.scheduler.refresh(TODAY)
+        return self.scheduler.overdue_task_ids(TODAY)
+
+    def test_foreign_writes_are_applied_without_seeding(self):
+        self.assertEqual(self.overdue(), [self.old])
+
+        added = self.other.save_to_db(task("Added elsewhere", "2025/04/01"))["data"]["task_id"]
+        later = self.other.save_to_db(task("Due later", "2025/07/01"))["data"]["task_id"]
+        self.assertEqual(self.overdue(), [added, self.old])
+
+        self.other.update_in_db(self.old, task("Old", "2025/05/01", status="completed"))
+        self.other.update_in_db(later, task("Due later", "2025/03/01"))
+        self.assertEqual(self.overdue(), [later, added])
+
+        self.other.delete_from_db(added)
+        self.assertEqual(self.overdue(), [later])
+        self.assertEqual(self.seeds, 0)
+
+    def test_seeds_when_the_change_log_is_too_old(self):
+        self.scheduler._version = -10 ** 6
+        self.other.save_to_db(task("Added elsewhere", "2025/04/01"))
+        self.assertEqual(len(self.overdue()), 2)
+        self.assertEqual(self.seeds, 1)
+
+    def test_callbacks_only_for_tasks_becoming_overdue(self):
+        called = []
+        self.scheduler.add_callback(lambda task_id, due_date: called.append(task_id))
+        # Already overdue when scheduled, like the seeded task
+        self.scheduler.schedule(100, "2025/05/15", today=TODAY)
+        self.scheduler.schedule(101, "2025/06/01", today=TODAY)
+        self.assertEqual(self.scheduler.overdue_task_ids(TODAY), [self.old, 100])
+        self.assertEqual(called, [])
+
+        self.assertEqual(self.scheduler.overdue_task_ids(date(2025, 6, 2)), [self.old, 100, 101])
+        self.assertEqual(called, [101])
+
+
+if __name__ == "__main__":
+    unittest.main()
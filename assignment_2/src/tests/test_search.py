@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import TaskManagerDB
+
+
+def task(title, description):
+    return {"title": title, "due_date": "2030/01/01", "status": "pending", "description": description,
+            "flag": "personal", "priority": "low"}
+
+
+# This class represents the tests of the full-text search over the task titles and descriptions.
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = TaskManagerDB(os.path.join(self.tmp.name, "test.db"))
+        self.db.migrate_db()
+        self.task_id = self.db.save_to_db(task("Quarterly report", "Collect the sales figures"))["data"]["task_id"]
+        self.db.save_to_db(task("Dentist", "Book an appointment"))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def search(self, query):
+        result = self.db.search_tasks(query)
+        self.assertTrue(result["success"], result["message"])
+        return [found["task_id"] for found in result["data"]]
+
+    def test_search_follows_updates(self):
+        self.assertEqual(self.search("sales figures"), [self.task_id])
+
+        self.db.update_in_db(self.task_id, task("Annual budget", "Review the spending"))
+        self.assertEqual(self.search("sales"), [])
+        self.assertEqual(self.search("quarterly"), [])
+        self.assertEqual(self.search("budget spending"), [self.task_id])
+
+    def test_search_forgets_deleted_tasks(self):
+        self.db.delete_from_db(self.task_id)
+        self.assertEqual(self.search("report"), [])
+
+    def test_title_matches_rank_first(self):
+        other = self.db.save_to_db(task("Groceries", "Buy paper for the report"))["data"]["task_id"]
+        self.assertEqual(self.search("report"), [self.task_id, other])
+
+
+if __name__ == "__main__":
+    unittest.main()
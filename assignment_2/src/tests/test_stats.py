@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import TaskManagerDB
+
+TODAY = date(2025, 6, 1)
+
+
+def task(title, due_date, status="pending", flag="personal", priority="low"):
+    return {"title": title, "due_date": due_date, "status": status, "description": "Test task", "flag": flag,
+            "priority": priority, "teams": []}
+
+
+# This class represents the tests of the counters maintained by the triggers behind fetch_stats. After every
+# write the counters are compared with the same counts computed from the tasks themselves.
+class TaskStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = TaskManagerDB(os.path.join(self.tmp.name, "test.db"))
+        self.db.migrate_db()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def assertStatsMatchTasks(self):
+        tasks = self.db.load_from_db()["data"]
+        today = TODAY.strftime("%Y/%m/%d")
+        expected = {"total": len(tasks), "status": {}, "flag": {}, "priority": {},
+                    "overdue": sum(1 for t in tasks if t["status"] == "pending" and t["due_date"] < today)}
+        for t in tasks:
+            for dimension in ("status", "flag", "priority"):
+                expected[dimension][t[dimension]] = expected[dimension].get(t[dimension], 0) + 1
+        self.assertEqual(self.db.fetch_stats(TODAY)["data"], expected)
+
+    def test_counters_follow_inserts_updates_and_deletes(self):
+        first = self.db.save_to_db(task("First", "2025/05/01"))["data"]["task_id"]
+        second = self.db.save_to_db(task("Second", "2025/07/01", flag="work", priority="high"))["data"]["task_id"]
+        self.db.save_many_to_db([task("Third", "2025/04/01"), task("Fourth", "2025/08/01", status="completed")])
+        self.assertStatsMatchTasks()
+
+        self.db.update_in_db(first, task("First", "2025/05/01", status="completed"))
+        self.db.update_in_db(second, task("Second", "2025/01/01", flag="work", priority="medium"))
+        self.assertStatsMatchTasks()
+
+        self.db.delete_from_db(second)
+        self.assertStatsMatchTasks()
+        self.assertEqual(self.db.fetch_stats(TODAY)["data"]["overdue"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import TaskManagerDB
+from writer import GroupCommitWriter
+from benchmarks.datagen import generate_tasks
+
+
+# This class represents the tests of the group commit of GroupCommitWriter.
+class GroupCommitWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # A single pooled connection, so the writer uses the connection the statements are traced on
+        self.db = TaskManagerDB(os.path.join(self.tmp.name, "test.db"), pool_size=1)
+        self.db.migrate_db()
+        self.statements = []
+        conn, cursor = self.db.connect_db()
+        conn.set_trace_callback(lambda statement: self.statements.append(statement.strip().upper()))
+        self.db.disconnect_db(conn, cursor)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_batch_is_committed_once(self):
+        # The batch stays open long enough for all the operations to be queued into it
+        writer = GroupCommitWriter(self.db, max_batch=50, max_delay=0.5)
+        tasks = list(generate_tasks(20, seed=1))
+        start = len(self.statements)
+        futures = [writer.submit("Error saving data", self.db._insert_task, task) for task in tasks]
+        responses = [future.result() for future in futures]
+        writer.close()
+
+        self.assertTrue(all(response["success"] for response in responses))
+        statements = self.statements[start:]
+        self.assertEqual(statements.count("BEGIN IMMEDIATE"), 1)
+        self.assertEqual(statements.count("COMMIT"), 1)
+        self.assertEqual(statements.count("SAVEPOINT TASK_WRITE"), len(tasks))
+        # The data version is bumped inside the batch transaction, before the commit
+        bump = next(index for index, statement in enumerate(statements) if "DB_VERSION" in statement)
+        self.assertLess(statements.index("BEGIN IMMEDIATE"), bump)
+        self.assertLess(bump, statements.index("COMMIT"))
+        self.assertEqual(len(self.db.load_from_db()["data"]), len(tasks))
+
+    def test_writer_survives_unexpected_errors(self):
+        writer = GroupCommitWriter(self.db)
+        task = next(generate_tasks(1, seed=2))
+        bump_version = self.db._bump_version
+
+        def failing_bump(cursor):
+            raise RuntimeError("bump failed")
+        self.db._bump_version = failing_bump
+        with self.assertRaises(RuntimeError):
+            writer.submit("Error saving data", self.db._insert_task, task).result(timeout=5)
+
+        # The failed batch was rolled back and the writer still commits the next one
+        self.db._bump_version = bump_version
+        response = writer.submit("Error saving data", self.db._insert_task, task).result(timeout=5)
+        writer.close()
+        self.assertTrue(response["success"])
+        self.assertEqual(len(self.db.load_from_db()["data"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of operations committed together
+GROUP_COMMIT_SIZE = 100
+# How long (in seconds) the writer waits for more operations after the first one of a batch arrives. With 0 a
+# batch holds whatever was queued while the previous batch was being committed, which adds no latency
+GROUP_COMMIT_DELAY = 0
+
+
+# This class represents the single writer thread of the write-behind mode. Operations from any thread are
+# queued, and the writer applies them in batches on one connection and commits each batch once, so the
+# cost of a commit (and its sync to disk) is shared by every operation in the batch.
+class GroupCommitWriter:
+    def __init__(self, db, max_batch=GROUP_COMMIT_SIZE, max_delay=GROUP_COMMIT_DELAY):
+        """
+        Starts the writer thread.
+
+        :param db: The `TaskManagerDB` whose connections, data version and cache the writer uses.
+        :param max_batch: The maximum number of operations committed together.
+        :param max_delay: How long (in seconds) a batch stays open for more operations. A batch is committed
+        as soon as it is full or this time has passed, whichever comes first.
+        """
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, error_message, operation, *args):
+        """
+        Queues a write operation. Returns a future that is resolved with the operation's response once
+        the batch it belongs to has been committed.
+
+        :param error_message: Prefix of the message returned when the operation fails.
+        :param operation: A function taking a cursor followed by `args` and returning the response and
+        the ID of the written task (None if nothing was written). It must not commit.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("The writer is closed")
+            self._queue.put((error_message, operation, args, future))
+        return future
+
+    def close(self):
+        """
+        Stops the writer once every queued operation has been committed.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def _next_batch(self):
+        """
+        Blocks until an operation arrives, then collects more until the batch is full or `max_delay` has passed.
+        Returns the batch and whether the writer was asked to stop.
+        """
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                timeout = deadline - time.monotonic()
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # The writer keeps running, otherwise every pending and later `submit` would wait forever
+                logger.exception("Writer batch failed", extra={"operations": len(batch)})
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch):
+        """
+        Applies a batch in one transaction. Every operation runs inside its own savepoint, so an operation
+        that fails is rolled back on its own without affecting the rest of the batch.
+
+        :param batch: The queued `(error_message, operation, args, future)` items.
+        """
+        results = []
+        version = None  # The data version the batch is committed at
+        try:
+            conn, cursor = self.db.connect_db()
+        except sqlite3.Error as e:
+            for error_message, _, _, future in batch:
+                future.set_result({"success": False, "message": f"{error_message}: {e}", "data": []})
+            return
+
+        try:
+            # The savepoints nest inside this transaction, so releasing one does not commit it. Without an open
+            # transaction the outermost RELEASE commits, and every operation would be committed on its own.
+            cursor.execute("BEGIN IMMEDIATE")
+            for error_message, operation, args, future in batch:
+                cursor.execute("SAVEPOINT task_write")
+                try:
+                    response, task_id = operation(cursor, *args)
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO task_write")
+                    response, task_id = {"success": False, "message": f"{error_message}: {e}", "data": []}, None
+                except Exception as e:
+                    # Anything else (e.g. a missing field) is raised in the thread that submitted the operation
+                    cursor.execute("ROLLBACK TO task_write")
+                    response, task_id = e, None
+                cursor.execute("RELEASE task_write")
+                results.append((future, response, task_id))
+            # The data version is bumped in the same transaction, so the batch is committed once
+            if any(task_id is not None for _, _, task_id in results):
+                version = self.db._bump_version(cursor)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            results = [(future, {"success": False, "message": f"{error_message}: {e}", "data": []}, None)
+                       for error_message, _, _, future in batch]
+        finally:
+            self.db.disconnect_db(conn, cursor)
+
+        for future, response, task_id in results:
+            if task_id is not None:
+                self.db.cache.invalidate(task_id, version)
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)